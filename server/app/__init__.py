@@ -1,12 +1,10 @@
 import os
-import time
-from flask import Flask
+from flask import Flask, jsonify
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
 from dotenv import load_dotenv
-from sqlalchemy.exc import OperationalError
 
 load_dotenv()
 
@@ -15,28 +13,54 @@ migrate = Migrate()
 jwt = JWTManager()
 
 
-# def wait_for_db(app, db):
-#     for i in range(10):
-#         try:
-#             with app.app_context():
-#                 db.session.execute("SELECT 1")
-#             print("✅ Database is ready.")
-#             return
-#         except OperationalError:
-#             print(f"⏳ Waiting for database... ({i+1}/10)")
-#             time.sleep(1)
-#     print("❌ Could not connect to the database.")
-#     # exit(1)
-
 def create_app():
-    """Application factory function"""
+    """Application factory function
+
+    Does no I/O, so the app can be created in a gunicorn parent before
+    forking (see gunicorn.conf.py); the schema is managed by migrations.
+    """
+    from app.utils.db_pool import engine_options
+    from app.utils.encoding import ResponseEncoder
+    
     app = Flask(__name__)
+    app.json = ResponseEncoder(app)
     
     app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-key')
     app.config['JWT_SECRET_KEY'] = os.environ.get('JWT_SECRET_KEY', 'jwt-dev-key')
     app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL')
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['DB_POOL_SIZE'] = int(os.environ.get('DB_POOL_SIZE', 5))
+    app.config['DB_MAX_OVERFLOW'] = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    app.config['DB_POOL_TIMEOUT'] = int(os.environ.get('DB_POOL_TIMEOUT', 30))  # seconds
+    app.config['DB_POOL_RECYCLE'] = int(os.environ.get('DB_POOL_RECYCLE', 1800))  # seconds, -1 = never
+    app.config['DB_POOL_PRE_PING'] = os.environ.get('DB_POOL_PRE_PING', 'true').lower() == 'true'
+    app.config['DB_STATEMENT_TIMEOUT'] = int(os.environ.get('DB_STATEMENT_TIMEOUT', 0))  # milliseconds, 0 = off
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'], app.config)
+    app.config['WARM_UP_RETRY_INTERVAL'] = float(os.environ.get('WARM_UP_RETRY_INTERVAL', 5))  # seconds
     app.config['JWT_ACCESS_TOKEN_EXPIRES'] = 86400  # 24 hours
+    app.config['USER_CACHE_TTL'] = float(os.environ.get('USER_CACHE_TTL', 60))  # seconds
+    app.config['USER_CACHE_SIZE'] = int(os.environ.get('USER_CACHE_SIZE', 1024))
+    app.config['PASSWORD_HASH_METHOD'] = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    app.config['PASSWORD_HASH_WORKERS'] = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))  # 0 = hash in the request thread
+    app.config['PASSWORD_HASH_MAX_PENDING'] = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 8))
+    app.config['PASSWORD_HASH_TIMEOUT'] = float(os.environ.get('PASSWORD_HASH_TIMEOUT', 5))  # seconds
+    app.config['REVOCATION_BLOOM_CAPACITY'] = int(os.environ.get('REVOCATION_BLOOM_CAPACITY', 100000))
+    app.config['REVOCATION_SYNC_INTERVAL'] = float(os.environ.get('REVOCATION_SYNC_INTERVAL', 1))  # seconds
+    app.config['REVOCATION_SYNC_OVERLAP'] = float(os.environ.get('REVOCATION_SYNC_OVERLAP', 30))  # seconds re-read per sync
+    app.config['REVOCATION_REBUILD_INTERVAL'] = float(os.environ.get('REVOCATION_REBUILD_INTERVAL', 600))  # seconds
+    app.config['BATCH_MAX_OPERATIONS'] = int(os.environ.get('BATCH_MAX_OPERATIONS', 1000))
+    app.config['IMPORT_CHUNK_SIZE'] = int(os.environ.get('IMPORT_CHUNK_SIZE', 5000))  # rows per commit
+    app.config['IMPORT_MAX_ERRORS'] = int(os.environ.get('IMPORT_MAX_ERRORS', 1000))  # row errors reported
+    app.config['EXPORT_CHUNK_SIZE'] = int(os.environ.get('EXPORT_CHUNK_SIZE', 500))  # cases per chunk
+    app.config['RESPONSE_CACHE_SIZE'] = int(os.environ.get('RESPONSE_CACHE_SIZE', 512))  # entries per worker, 0 = off
+    app.config['RESPONSE_CACHE_MAX_BYTES'] = int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+    app.config['RESPONSE_CACHE_TTL'] = float(os.environ.get('RESPONSE_CACHE_TTL', 300))  # seconds
+    app.config['RESPONSE_CACHE_URL'] = os.environ.get('RESPONSE_CACHE_URL', '')  # redis://..., file:///path or empty
+    app.config['SEARCH_BACKEND'] = os.environ.get('SEARCH_BACKEND', 'auto')  # 'auto' or 'ilike'
+    app.config['SEARCH_MAX_WORKERS'] = int(os.environ.get('SEARCH_MAX_WORKERS', 1))  # 1 = sequential
+    app.config['SUGGEST_SYNC_INTERVAL'] = float(os.environ.get('SUGGEST_SYNC_INTERVAL', 5))  # seconds
+    app.config['SUGGEST_SYNC_OVERLAP'] = float(os.environ.get('SUGGEST_SYNC_OVERLAP', 30))  # seconds re-read per sync
+    app.config['SUGGEST_REBUILD_INTERVAL'] = float(os.environ.get('SUGGEST_REBUILD_INTERVAL', 300))  # seconds
     
     db.init_app(app)
     migrate.init_app(app, db)
@@ -50,6 +74,11 @@ def create_app():
     from app.routes.investigations import investigations_bp
     from app.routes.targets import targets_bp
     from app.routes.search import search_bp
+    from app.routes.batch import batch_bp
+    from app.routes.imports import imports_bp
+    from app.routes.export import export_bp
+    from app.routes.admin import admin_bp
+    from app.routes.health import health_bp
     
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(cases_bp, url_prefix='/api/cases')
@@ -57,11 +86,49 @@ def create_app():
     app.register_blueprint(investigations_bp, url_prefix='/api/investigations')
     app.register_blueprint(targets_bp, url_prefix='/api/targets')
     app.register_blueprint(search_bp, url_prefix='/api/search')
+    app.register_blueprint(batch_bp, url_prefix='/api/batch')
+    app.register_blueprint(imports_bp, url_prefix='/api/import')
+    app.register_blueprint(export_bp, url_prefix='/api/export')
+    app.register_blueprint(admin_bp, url_prefix='/api/admin')
+    app.register_blueprint(health_bp)
+    
+    from app.services.passwords import HashingBusyError
+    from app.services.revocation import is_token_revoked
+    from app.utils.pagination import InvalidCountError, InvalidCursorError
+    from app.utils.serialization import InvalidFieldsError
+    
+    @jwt.token_in_blocklist_loader
+    def check_token_revoked(jwt_header, jwt_payload):
+        return is_token_revoked(jwt_payload)
+    
+    @app.errorhandler(InvalidCursorError)
+    def handle_invalid_cursor(e):
+        return jsonify({
+            'message': str(e),
+            'status': 'error'
+        }), 400
+    
+    @app.errorhandler(InvalidCountError)
+    def handle_invalid_count(e):
+        return jsonify({
+            'message': str(e),
+            'status': 'error'
+        }), 400
+    
+    @app.errorhandler(InvalidFieldsError)
+    def handle_invalid_fields(e):
+        return jsonify({
+            'message': str(e),
+            'status': 'error'
+        }), 400
+    
+    @app.errorhandler(HashingBusyError)
+    def handle_hashing_busy(e):
+        response = jsonify({
+            'message': str(e),
+            'status': 'error'
+        })
+        response.headers['Retry-After'] = '1'
+        return response, 503
     
-    # wait_for_db(app, db)  # ← ここでDB接続を待つ
-
-    # ✅ DB作成はここで行う（wait_for_db成功後に）
-    # with app.app_context():
-    #     db.create_all()
-        
     return app
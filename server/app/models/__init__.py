@@ -1,5 +1,14 @@
+from sqlalchemy import DDL, event
+from app import db
+from app.services.search import BIGRAM_FUNCTION_SQL
 from app.models.user import User
 from app.models.case import Case
 from app.models.customer import Customer
 from app.models.investigation import Investigation
 from app.models.target import Target
+from app.models.revoked_token import RevokedToken
+from app.models.table_version import TableVersion
+
+# The bigram search indexes are built on this function, so it has to exist
+# before the tables are created.
+event.listen(db.metadata, 'before_create', DDL(BIGRAM_FUNCTION_SQL).execute_if(dialect='postgresql'))
@@ -1,5 +1,9 @@
 from datetime import datetime
+from sqlalchemy import func, select
 from app import db
+from app.services.search import search_bigrams
+from app.models.customer import Customer
+from app.models.investigation import Investigation
 
 class Case(db.Model):
     """Case model representing a case in the system"""
@@ -12,21 +16,57 @@ class Case(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    customers = db.relationship('Customer', backref='case', lazy='dynamic', cascade='all, delete-orphan')
-    investigations = db.relationship('Investigation', backref='case', lazy='dynamic', cascade='all, delete-orphan')
+    customers = db.relationship('Customer', backref='case', lazy='select', cascade='all, delete-orphan')
+    investigations = db.relationship('Investigation', backref='case', lazy='select', cascade='all, delete-orphan')
     
-    def to_dict(self):
-        """Convert case object to dictionary"""
+    @classmethod
+    def child_counts(cls, case_ids):
+        """Get customer/investigation counts for many cases in one query"""
+        if not case_ids:
+            return {}
+        
+        customer_count = select(func.count(Customer.id)).where(
+            Customer.case_id == cls.id
+        ).correlate(cls).scalar_subquery()
+        investigation_count = select(func.count(Investigation.id)).where(
+            Investigation.case_id == cls.id
+        ).correlate(cls).scalar_subquery()
+        
+        rows = db.session.execute(
+            select(cls.id, customer_count, investigation_count).where(cls.id.in_(case_ids))
+        )
         return {
+            case_id: {'customer_count': customers, 'investigation_count': investigations}
+            for case_id, customers, investigations in rows
+        }
+    
+    def to_dict(self, include_counts=True, counts=None):
+        """Convert case object to dictionary
+        
+        When ``counts`` is given (see ``child_counts``) it is used as-is,
+        otherwise the counts are queried per row if ``include_counts`` is set.
+        """
+        data = {
             'id': self.id,
             'name': self.name,
             'description': self.description,
             'status': self.status,
             'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat(),
-            'customer_count': self.customers.count(),
-            'investigation_count': self.investigations.count()
+            'updated_at': self.updated_at.isoformat()
         }
+        
+        if counts is not None:
+            data.update(counts)
+        elif include_counts:
+            data.update(self.child_counts([self.id])[self.id])
+        
+        return data
     
     def __repr__(self):
         return f'<Case {self.name}>'
+
+db.Index('ix_cases_status_created_at_id', Case.status, Case.created_at, Case.id)
+db.Index('ix_cases_created_at_id', Case.created_at, Case.id)
+db.Index('ix_cases_updated_at', Case.updated_at)
+db.Index('ix_cases_name_bigrams', search_bigrams(Case.name), postgresql_using='gin').ddl_if(dialect='postgresql')
+db.Index('ix_cases_description_bigrams', search_bigrams(Case.description), postgresql_using='gin').ddl_if(dialect='postgresql')
@@ -1,5 +1,6 @@
 from datetime import datetime
 from app import db
+from app.services.search import search_bigrams
 
 class Customer(db.Model):
     """Customer model representing a customer associated with a case"""
@@ -29,3 +30,11 @@ class Customer(db.Model):
     
     def __repr__(self):
         return f'<Customer {self.name}>'
+
+db.Index('ix_customers_case_id_created_at_id', Customer.case_id, Customer.created_at, Customer.id)
+db.Index('ix_customers_created_at_id', Customer.created_at, Customer.id)
+db.Index('ix_customers_updated_at', Customer.updated_at)
+db.Index('ix_customers_name_bigrams', search_bigrams(Customer.name), postgresql_using='gin').ddl_if(dialect='postgresql')
+db.Index('ix_customers_email_bigrams', search_bigrams(Customer.email), postgresql_using='gin').ddl_if(dialect='postgresql')
+db.Index('ix_customers_phone_bigrams', search_bigrams(Customer.phone), postgresql_using='gin').ddl_if(dialect='postgresql')
+db.Index('ix_customers_address_bigrams', search_bigrams(Customer.address), postgresql_using='gin').ddl_if(dialect='postgresql')
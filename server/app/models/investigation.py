@@ -1,5 +1,8 @@
 from datetime import datetime
+from sqlalchemy import func, select
 from app import db
+from app.services.search import search_bigrams
+from app.models.target import Target
 
 class Investigation(db.Model):
     """Investigation model representing an investigation associated with a case"""
@@ -15,11 +18,31 @@ class Investigation(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    targets = db.relationship('Target', backref='investigation', lazy='dynamic', cascade='all, delete-orphan')
+    targets = db.relationship('Target', backref='investigation', lazy='select', cascade='all, delete-orphan')
     
-    def to_dict(self):
-        """Convert investigation object to dictionary"""
-        return {
+    @classmethod
+    def child_counts(cls, investigation_ids):
+        """Get target counts for many investigations in one query"""
+        if not investigation_ids:
+            return {}
+        
+        rows = db.session.execute(
+            select(Target.investigation_id, func.count(Target.id))
+            .where(Target.investigation_id.in_(investigation_ids))
+            .group_by(Target.investigation_id)
+        )
+        counts = {investigation_id: {'target_count': 0} for investigation_id in investigation_ids}
+        for investigation_id, targets in rows:
+            counts[investigation_id] = {'target_count': targets}
+        return counts
+    
+    def to_dict(self, include_counts=True, counts=None):
+        """Convert investigation object to dictionary
+        
+        When ``counts`` is given (see ``child_counts``) it is used as-is,
+        otherwise the target count is queried per row if ``include_counts`` is set.
+        """
+        data = {
             'id': self.id,
             'case_id': self.case_id,
             'title': self.title,
@@ -28,9 +51,22 @@ class Investigation(db.Model):
             'start_date': self.start_date.isoformat() if self.start_date else None,
             'end_date': self.end_date.isoformat() if self.end_date else None,
             'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat(),
-            'target_count': self.targets.count()
+            'updated_at': self.updated_at.isoformat()
         }
+        
+        if counts is not None:
+            data.update(counts)
+        elif include_counts:
+            data.update(self.child_counts([self.id])[self.id])
+        
+        return data
     
     def __repr__(self):
         return f'<Investigation {self.title}>'
+
+db.Index('ix_investigations_case_id_created_at_id', Investigation.case_id, Investigation.created_at, Investigation.id)
+db.Index('ix_investigations_status_created_at_id', Investigation.status, Investigation.created_at, Investigation.id)
+db.Index('ix_investigations_created_at_id', Investigation.created_at, Investigation.id)
+db.Index('ix_investigations_updated_at', Investigation.updated_at)
+db.Index('ix_investigations_title_bigrams', search_bigrams(Investigation.title), postgresql_using='gin').ddl_if(dialect='postgresql')
+db.Index('ix_investigations_description_bigrams', search_bigrams(Investigation.description), postgresql_using='gin').ddl_if(dialect='postgresql')
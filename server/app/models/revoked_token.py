@@ -0,0 +1,15 @@
+from datetime import datetime
+from app import db
+
+class RevokedToken(db.Model):
+    """Revoked access token, or revocation of every token a user was issued so far"""
+    __tablename__ = 'revoked_tokens'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    jti = db.Column(db.String(36), unique=True)  # NULL for user-wide revocations
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True, index=True)
+    revoked_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    
+    def __repr__(self):
+        return f'<RevokedToken {self.jti or f"user:{self.user_id}"}>'
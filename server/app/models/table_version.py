@@ -0,0 +1,13 @@
+from datetime import datetime
+from app import db
+
+class TableVersion(db.Model):
+    """Change counter of a table, bumped in the transaction of every write to it"""
+    __tablename__ = 'table_versions'
+    
+    table_name = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f'<TableVersion {self.table_name} {self.version}>'
@@ -1,5 +1,6 @@
 from datetime import datetime
 from app import db
+from app.services.search import search_bigrams
 
 class Target(db.Model):
     """Target model representing a target associated with an investigation"""
@@ -29,3 +30,11 @@ class Target(db.Model):
     
     def __repr__(self):
         return f'<Target {self.name}>'
+
+db.Index('ix_targets_investigation_id_created_at_id', Target.investigation_id, Target.created_at, Target.id)
+db.Index('ix_targets_status_created_at_id', Target.status, Target.created_at, Target.id)
+db.Index('ix_targets_created_at_id', Target.created_at, Target.id)
+db.Index('ix_targets_updated_at', Target.updated_at)
+db.Index('ix_targets_name_bigrams', search_bigrams(Target.name), postgresql_using='gin').ddl_if(dialect='postgresql')
+db.Index('ix_targets_type_bigrams', search_bigrams(Target.type), postgresql_using='gin').ddl_if(dialect='postgresql')
+db.Index('ix_targets_details_bigrams', search_bigrams(Target.details), postgresql_using='gin').ddl_if(dialect='postgresql')
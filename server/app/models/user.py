@@ -1,6 +1,7 @@
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy.orm import validates
 from app import db
+from app.services.passwords import hash_password, needs_rehash, verify_password
 
 class User(db.Model):
     """User model for authentication and authorization"""
@@ -11,18 +12,36 @@ class User(db.Model):
     email = db.Column(db.String(120), unique=True, nullable=False)
     password_hash = db.Column(db.String(256), nullable=False)
     role = db.Column(db.String(20), nullable=False, default='general')  # 'admin' or 'general'
+    role_version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     def __init__(self, username, email, password, role='general'):
         self.username = username
         self.email = email
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
         self.role = role
     
+    @validates('role')
+    def validate_role(self, key, role):
+        """Bump the role version whenever an existing role changes"""
+        if self.role is not None and role != self.role:
+            self.role_version = (self.role_version or 1) + 1
+        return role
+    
     def check_password(self, password):
         """Check if the provided password matches the stored hash"""
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
+    
+    def rehash_password_if_needed(self, password):
+        """Re-hash a verified password when the hash policy has changed
+        
+        Returns True when the stored hash was replaced.
+        """
+        if not needs_rehash(self.password_hash):
+            return False
+        self.password_hash = hash_password(password)
+        return True
     
     def is_admin(self):
         """Check if the user has admin role"""
@@ -0,0 +1,18 @@
+from flask import Blueprint, jsonify
+from flask_jwt_extended import jwt_required
+from app import db
+from app.utils.auth import admin_required
+from app.utils.db_pool import pool_status
+
+admin_bp = Blueprint('admin', __name__)
+
+@admin_bp.route('/pool', methods=['GET'])
+@jwt_required()
+@admin_required()
+def get_pool_status():
+    """Get the database connection pool state of the worker serving the request (admin only)"""
+    return jsonify({
+        'message': 'コネクションプールの状態を取得しました。',
+        'status': 'success',
+        'pool': pool_status(db.engine)
+    }), 200
@@ -1,7 +1,11 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import create_access_token, jwt_required, get_jwt, get_jwt_identity
 from app.models.user import User
 from app import db
+from app.services.passwords import HashingBusyError
+from app.services.revocation import revoke_token, revoke_user_tokens
+from app.utils.auth import admin_required, current_user_is_admin, token_claims
+from app.utils.user_cache import user_cache
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -24,7 +28,13 @@ def login():
             'status': 'error'
         }), 401
     
-    access_token = create_access_token(identity=str(user.id))
+    try:
+        if user.rehash_password_if_needed(data['password']):
+            db.session.commit()
+    except HashingBusyError:
+        pass  # the old hash still works, so try again on a later login
+    
+    access_token = create_access_token(identity=str(user.id), additional_claims=token_claims(user))
     
     return jsonify({
         'message': 'ログインに成功しました。',
@@ -33,12 +43,51 @@ def login():
         'user': user.to_dict()
     }), 200
 
+@auth_bp.route('/logout', methods=['POST'])
+@jwt_required()
+def logout():
+    """Revoke the current access token"""
+    revoke_token(get_jwt())
+    db.session.commit()
+    
+    return jsonify({
+        'message': 'ログアウトしました。',
+        'status': 'success'
+    }), 200
+
+@auth_bp.route('/revoke', methods=['POST'])
+@jwt_required()
+@admin_required()
+def revoke():
+    """Revoke every token issued to a user so far (admin only)"""
+    data = request.get_json()
+    
+    if not data or not data.get('user_id'):
+        return jsonify({
+            'message': 'ユーザーIDが必要です。',
+            'status': 'error'
+        }), 400
+    
+    user = db.session.get(User, data['user_id'])
+    if not user:
+        return jsonify({
+            'message': 'ユーザーが見つかりません。',
+            'status': 'error'
+        }), 404
+    
+    revoke_user_tokens(user.id)
+    db.session.commit()
+    
+    return jsonify({
+        'message': 'ユーザーのトークンを無効化しました。',
+        'status': 'success'
+    }), 200
+
 @auth_bp.route('/user', methods=['GET'])
 @jwt_required()
 def get_user():
     """Get current user info"""
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user = user_cache.get(get_jwt_identity())
     
     if not user:
         return jsonify({
@@ -49,17 +98,14 @@ def get_user():
     return jsonify({
         'message': 'ユーザー情報を取得しました。',
         'status': 'success',
-        'user': user.to_dict()
+        'user': {key: value for key, value in user.items() if key != 'role_version'}
     }), 200
 
 @auth_bp.route('/register', methods=['POST'])
 @jwt_required()
 def register():
     """Register a new user (admin only)"""
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
-    
-    if not current_user or not current_user.is_admin():
+    if not current_user_is_admin():
         return jsonify({
             'message': '管理者権限が必要です。',
             'status': 'error'
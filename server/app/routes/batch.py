@@ -0,0 +1,55 @@
+from flask import Blueprint, current_app, request, jsonify
+from flask_jwt_extended import jwt_required
+from sqlalchemy.exc import SQLAlchemyError
+from app import db
+from app.services.batch import BatchError, run_batch
+from app.utils.auth import admin_required
+
+batch_bp = Blueprint('batch', __name__)
+
+@batch_bp.route('', methods=['POST'])
+@jwt_required()
+@admin_required()
+def batch():
+    """Run create/update/delete operations in one transaction (admin only)"""
+    data = request.get_json()
+    operations = data.get('operations') if isinstance(data, dict) else None
+    
+    if not isinstance(operations, list) or not operations:
+        return jsonify({
+            'message': '操作の一覧が必要です。',
+            'status': 'error'
+        }), 400
+    
+    max_operations = current_app.config['BATCH_MAX_OPERATIONS']
+    if len(operations) > max_operations:
+        return jsonify({
+            'message': f'一度に実行できる操作は{max_operations}件までです。',
+            'status': 'error'
+        }), 400
+    
+    try:
+        results = run_batch(operations)
+        db.session.commit()
+    except BatchError as e:
+        db.session.rollback()
+        return jsonify({
+            'message': str(e),
+            'status': 'error',
+            'index': e.index
+        }), e.status_code
+    except SQLAlchemyError:
+        # The commit itself failed; no single operation is to blame
+        db.session.rollback()
+        current_app.logger.warning('Batch commit failed', exc_info=True)
+        return jsonify({
+            'message': 'データベースへの書き込みに失敗しました。',
+            'status': 'error',
+            'index': None
+        }), 400
+    
+    return jsonify({
+        'message': 'バッチ処理が正常に完了しました。',
+        'status': 'success',
+        'results': results
+    }), 200
@@ -3,39 +3,32 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.models.user import User
 from app.models.case import Case
 from app import db
+from app.services.case_tree import MAX_TREE_DEPTH, load_case_tree
 from app.utils.auth import admin_required
+from app.utils.http_cache import conditional
+from app.utils.pagination import paginate
+from app.utils.serialization import parse_fields, parse_include, reject_fields, serialize_item, serialize_items, with_fields
 
 cases_bp = Blueprint('cases', __name__)
 
 @cases_bp.route('', methods=['GET'])
 @jwt_required()
+@conditional('cases', 'customers', 'investigations')
 def get_cases():
     """Get all cases"""
     try:
-        page = request.args.get("page", default=1, type=int)
-        per_page = request.args.get("per_page", default=10, type=int)
+        include_counts = 'counts' in parse_include()
+        fields = parse_fields(Case)
 
-        if not page or page < 1:
-            page = 1
-        if not per_page or per_page < 1:
-            per_page = 10
+        cases, pagination = paginate(with_fields(Case.query, Case, fields), Case)
 
-        cases = Case.query.paginate(page=page, per_page=per_page)
-
-        cases_data = [case.to_dict() for case in cases.items]
+        cases_data = serialize_items(cases, include_counts, fields)
         
         return jsonify({
             'message': 'ケース一覧を取得しました。',
             'status': 'success',
             'cases': cases_data,
-            'pagination': {
-                'total': cases.total,
-                'pages': cases.pages,
-                'page': page,
-                'per_page': per_page,
-                'has_next': cases.has_next,
-                'has_prev': cases.has_prev
-            }
+            'pagination': pagination
         }), 200
 
     except Exception as e:
@@ -44,9 +37,11 @@ def get_cases():
 
 @cases_bp.route('/<int:case_id>', methods=['GET'])
 @jwt_required()
+@conditional('cases', 'customers', 'investigations')
 def get_case(case_id):
     """Get a specific case"""
-    case = Case.query.get(case_id)
+    fields = parse_fields(Case)
+    case = with_fields(Case.query, Case, fields).get(case_id)
     
     if not case:
         return jsonify({
@@ -57,7 +52,34 @@ def get_case(case_id):
     return jsonify({
         'message': 'ケースを取得しました。',
         'status': 'success',
-        'case': case.to_dict()
+        'case': serialize_item(case, fields)
+    }), 200
+
+@cases_bp.route('/<int:case_id>/tree', methods=['GET'])
+@jwt_required()
+@conditional('cases', 'customers', 'investigations', 'targets')
+def get_case_tree(case_id):
+    """Get a case with its customers, investigations and targets"""
+    reject_fields()
+    depth = request.args.get('depth', MAX_TREE_DEPTH, type=int)
+    if depth is None or not 0 <= depth <= MAX_TREE_DEPTH:
+        return jsonify({
+            'message': f'depthは0から{MAX_TREE_DEPTH}の整数で指定してください。',
+            'status': 'error'
+        }), 400
+    
+    case = load_case_tree(case_id, depth)
+    
+    if not case:
+        return jsonify({
+            'message': 'ケースが見つかりません。',
+            'status': 'error'
+        }), 404
+    
+    return jsonify({
+        'message': 'ケースを取得しました。',
+        'status': 'success',
+        'case': case
     }), 200
 
 @cases_bp.route('', methods=['POST'])
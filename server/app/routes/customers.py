@@ -5,39 +5,36 @@ from app.models.customer import Customer
 from app.models.case import Case
 from app import db
 from app.utils.auth import admin_required
+from app.utils.http_cache import conditional
+from app.utils.pagination import paginate
+from app.utils.serialization import parse_fields, serialize_item, serialize_items, with_fields
 
 customers_bp = Blueprint('customers', __name__)
 
 @customers_bp.route('', methods=['GET'])
 @jwt_required()
+@conditional('customers')
 def get_customers():
     """Get all customers"""
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 10, type=int)
+    fields = parse_fields(Customer)
+    customers, pagination = paginate(with_fields(Customer.query, Customer, fields), Customer)
     
-    customers_pagination = Customer.query.paginate(page=page, per_page=per_page)
-    
-    customers_data = [customer.to_dict() for customer in customers_pagination.items]
+    customers_data = serialize_items(customers, fields=fields)
     
     return jsonify({
         'message': '顧客一覧を取得しました。',
         'status': 'success',
         'customers': customers_data,
-        'pagination': {
-            'total': customers_pagination.total,
-            'pages': customers_pagination.pages,
-            'page': page,
-            'per_page': per_page,
-            'has_next': customers_pagination.has_next,
-            'has_prev': customers_pagination.has_prev
-        }
+        'pagination': pagination
     }), 200
 
 @customers_bp.route('/<int:customer_id>', methods=['GET'])
 @jwt_required()
+@conditional('customers')
 def get_customer(customer_id):
     """Get a specific customer"""
-    customer = Customer.query.get(customer_id)
+    fields = parse_fields(Customer)
+    customer = with_fields(Customer.query, Customer, fields).get(customer_id)
     
     if not customer:
         return jsonify({
@@ -48,7 +45,7 @@ def get_customer(customer_id):
     return jsonify({
         'message': '顧客を取得しました。',
         'status': 'success',
-        'customer': customer.to_dict()
+        'customer': serialize_item(customer, fields)
     }), 200
 
 @customers_bp.route('', methods=['POST'])
@@ -151,6 +148,7 @@ def delete_customer(customer_id):
 
 @customers_bp.route('/case/<int:case_id>', methods=['GET'])
 @jwt_required()
+@conditional('cases', 'customers')
 def get_customers_by_case(case_id):
     """Get customers for a specific case"""
     case = Case.query.get(case_id)
@@ -160,23 +158,14 @@ def get_customers_by_case(case_id):
             'status': 'error'
         }), 404
     
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 10, type=int)
-    
-    customers_pagination = Customer.query.filter_by(case_id=case_id).paginate(page=page, per_page=per_page)
+    fields = parse_fields(Customer)
+    customers, pagination = paginate(with_fields(Customer.query.filter_by(case_id=case_id), Customer, fields), Customer)
     
-    customers_data = [customer.to_dict() for customer in customers_pagination.items]
+    customers_data = serialize_items(customers, fields=fields)
     
     return jsonify({
         'message': 'ケースの顧客一覧を取得しました。',
         'status': 'success',
         'customers': customers_data,
-        'pagination': {
-            'total': customers_pagination.total,
-            'pages': customers_pagination.pages,
-            'page': page,
-            'per_page': per_page,
-            'has_next': customers_pagination.has_next,
-            'has_prev': customers_pagination.has_prev
-        }
+        'pagination': pagination
     }), 200
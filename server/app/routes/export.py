@@ -0,0 +1,30 @@
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
+from flask_jwt_extended import jwt_required
+from app.services.export import EXPORT_FORMATS, export_case_trees, gzip_chunks
+from app.utils.serialization import reject_fields
+
+export_bp = Blueprint('export', __name__)
+
+@export_bp.route('/cases', methods=['GET'])
+@jwt_required()
+def export_cases():
+    """Stream all cases with their customers, investigations and targets
+    
+    ``?format=ndjson`` (default) writes one case tree per line, ``?format=csv``
+    one row per record. The body is gzipped when the client accepts it.
+    """
+    reject_fields()
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({
+            'message': 'エクスポート形式はndjsonまたはcsvを指定してください。',
+            'status': 'error'
+        }), 400
+    
+    chunks = export_case_trees(fmt, current_app.config['EXPORT_CHUNK_SIZE'])
+    headers = {'Content-Disposition': f'attachment; filename=cases.{fmt}', 'Vary': 'Accept-Encoding'}
+    if 'gzip' in request.accept_encodings:
+        chunks = gzip_chunks(chunks)
+        headers['Content-Encoding'] = 'gzip'
+    
+    return Response(stream_with_context(chunks), mimetype=EXPORT_FORMATS[fmt], headers=headers)
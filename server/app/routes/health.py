@@ -0,0 +1,41 @@
+from flask import Blueprint, jsonify
+from app.services.readiness import database_answers, is_warm
+
+health_bp = Blueprint('health', __name__)
+
+@health_bp.route('/healthz', methods=['GET'])
+def healthz():
+    """Liveness probe: the process serves requests; does no I/O"""
+    response = jsonify({
+        'message': '稼働中です。',
+        'status': 'success'
+    })
+    response.headers['Cache-Control'] = 'no-store'
+    return response, 200
+
+@health_bp.route('/readyz', methods=['GET'])
+def readyz():
+    """Readiness probe: the database answers and this worker's pool and indexes are warm
+
+    Only checks; the warm-up itself runs when the worker starts.
+    """
+    if not database_answers():
+        response = jsonify({
+            'message': 'データベースに接続できません。',
+            'status': 'error'
+        })
+        status_code = 503
+    elif not is_warm():
+        response = jsonify({
+            'message': 'ウォームアップ中です。',
+            'status': 'error'
+        })
+        status_code = 503
+    else:
+        response = jsonify({
+            'message': 'リクエストを受け付けられます。',
+            'status': 'success'
+        })
+        status_code = 200
+    response.headers['Cache-Control'] = 'no-store'
+    return response, status_code
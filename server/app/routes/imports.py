@@ -0,0 +1,50 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
+from app.services.importer import IMPORT_ENTITIES, IMPORT_FORMATS, ImportFormatError, detect_format, import_rows
+from app.utils.auth import admin_required
+
+imports_bp = Blueprint('imports', __name__)
+
+@imports_bp.route('/<entity_type>', methods=['POST'])
+@jwt_required()
+@admin_required()
+def import_entities(entity_type):
+    """Import customers or targets from a CSV/JSONL file (admin only)
+    
+    The file is sent either as the ``file`` field of a multipart form or as
+    the raw request body with ``?format=csv|jsonl``.
+    """
+    if entity_type not in IMPORT_ENTITIES:
+        return jsonify({
+            'message': '顧客またはターゲットのみインポートできます。',
+            'status': 'error'
+        }), 404
+    
+    upload = request.files.get('file')
+    stream = upload.stream if upload else request.stream
+    fmt = request.args.get('format') or (detect_format(upload.filename) if upload else None)
+    if fmt not in IMPORT_FORMATS:
+        return jsonify({
+            'message': 'ファイル形式はcsvまたはjsonlを指定してください。',
+            'status': 'error'
+        }), 400
+    
+    parent_id = request.args.get('parent_id', type=int)
+    
+    try:
+        result = import_rows(stream, entity_type, fmt, parent_id=parent_id)
+    except ImportFormatError as e:
+        # Chunks read before the error are committed; report them so the caller can resume
+        return jsonify({
+            'message': str(e),
+            'status': 'error',
+            'imported': e.imported,
+            'failed': e.failed,
+            'line': e.line
+        }), 400
+    
+    return jsonify({
+        'message': f'{result["imported"]}件をインポートしました。',
+        'status': 'success',
+        **result
+    }), 200
@@ -6,39 +6,38 @@ from app.models.case import Case
 from app import db
 from datetime import datetime
 from app.utils.auth import admin_required
+from app.utils.http_cache import conditional
+from app.utils.pagination import paginate
+from app.utils.serialization import parse_fields, parse_include, serialize_item, serialize_items, with_fields
 
 investigations_bp = Blueprint('investigations', __name__)
 
 @investigations_bp.route('', methods=['GET'])
 @jwt_required()
+@conditional('investigations', 'targets')
 def get_investigations():
     """Get all investigations"""
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 10, type=int)
+    include_counts = 'counts' in parse_include()
     
-    investigations_pagination = Investigation.query.paginate(page=page, per_page=per_page)
+    fields = parse_fields(Investigation)
+    investigations, pagination = paginate(with_fields(Investigation.query, Investigation, fields), Investigation)
     
-    investigations_data = [investigation.to_dict() for investigation in investigations_pagination.items]
+    investigations_data = serialize_items(investigations, include_counts, fields)
     
     return jsonify({
         'message': '調査一覧を取得しました。',
         'status': 'success',
         'investigations': investigations_data,
-        'pagination': {
-            'total': investigations_pagination.total,
-            'pages': investigations_pagination.pages,
-            'page': page,
-            'per_page': per_page,
-            'has_next': investigations_pagination.has_next,
-            'has_prev': investigations_pagination.has_prev
-        }
+        'pagination': pagination
     }), 200
 
 @investigations_bp.route('/<int:investigation_id>', methods=['GET'])
 @jwt_required()
+@conditional('investigations', 'targets')
 def get_investigation(investigation_id):
     """Get a specific investigation"""
-    investigation = Investigation.query.get(investigation_id)
+    fields = parse_fields(Investigation)
+    investigation = with_fields(Investigation.query, Investigation, fields).get(investigation_id)
     
     if not investigation:
         return jsonify({
@@ -49,7 +48,7 @@ def get_investigation(investigation_id):
     return jsonify({
         'message': '調査を取得しました。',
         'status': 'success',
-        'investigation': investigation.to_dict()
+        'investigation': serialize_item(investigation, fields)
     }), 200
 
 @investigations_bp.route('', methods=['POST'])
@@ -199,6 +198,7 @@ def delete_investigation(investigation_id):
 
 @investigations_bp.route('/case/<int:case_id>', methods=['GET'])
 @jwt_required()
+@conditional('cases', 'investigations', 'targets')
 def get_investigations_by_case(case_id):
     """Get investigations for a specific case"""
     case = Case.query.get(case_id)
@@ -208,23 +208,16 @@ def get_investigations_by_case(case_id):
             'status': 'error'
         }), 404
     
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 10, type=int)
+    include_counts = 'counts' in parse_include()
     
-    investigations_pagination = Investigation.query.filter_by(case_id=case_id).paginate(page=page, per_page=per_page)
+    fields = parse_fields(Investigation)
+    investigations, pagination = paginate(with_fields(Investigation.query.filter_by(case_id=case_id), Investigation, fields), Investigation)
     
-    investigations_data = [investigation.to_dict() for investigation in investigations_pagination.items]
+    investigations_data = serialize_items(investigations, include_counts, fields)
     
     return jsonify({
         'message': 'ケースの調査一覧を取得しました。',
         'status': 'success',
         'investigations': investigations_data,
-        'pagination': {
-            'total': investigations_pagination.total,
-            'pages': investigations_pagination.pages,
-            'page': page,
-            'per_page': per_page,
-            'has_next': investigations_pagination.has_next,
-            'has_prev': investigations_pagination.has_prev
-        }
+        'pagination': pagination
     }), 200
@@ -1,3 +1,4 @@
+from functools import partial
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required
 from sqlalchemy import or_, and_
@@ -5,11 +6,59 @@ from app.models.case import Case
 from app.models.customer import Customer
 from app.models.investigation import Investigation
 from app.models.target import Target
+from app import db
+from app.services.facets import InvalidFacetsError, facet_counts, parse_facets
+from app.services.query_dsl import QuerySyntaxError, compile_query
+from app.services.relations import related_exists
+from app.services.search import contains, run_concurrently
+from app.services.suggest import suggest_index
+from app.services.unified import unified_search
+from app.utils.http_cache import cached
+from app.utils.pagination import DEFAULT_PER_PAGE, paginate_offset
+from app.utils.serialization import parse_fields, parse_include, reject_fields, serialize_items, with_fields
 
 search_bp = Blueprint('search', __name__)
 
+
+def _search_entity(key, query, model, include_counts, facets):
+    """Run the paginated query (and facet counts) for one entity and serialize the page"""
+    query = query.with_session(db.session())
+    fields = parse_fields(model, strict=False)
+    items, pagination = paginate_offset(with_fields(query, model, fields), model)
+    facet_data = facet_counts(query, key, facets) if facets else None
+    return key, serialize_items(items, include_counts, fields), pagination, facet_data
+
+
+def _unified_search_response(data, entities):
+    """Build the response for mode=unified: one ranked list over all entities"""
+    reject_fields()
+    if not data.get('q'):
+        return jsonify({
+            'message': '検索キーワードが必要です。',
+            'status': 'error'
+        }), 400
+    
+    limit = request.args.get('limit', DEFAULT_PER_PAGE, type=int)
+    if not limit or limit < 1:
+        limit = DEFAULT_PER_PAGE
+    
+    hits, next_cursor = unified_search(str(data['q']), entities, limit, request.args.get('cursor'))
+    
+    return jsonify({
+        'message': '検索結果を取得しました。',
+        'status': 'success',
+        'results': hits,
+        'pagination': {
+            'limit': limit,
+            'next_cursor': next_cursor,
+            'has_next': next_cursor is not None
+        }
+    }), 200
+
+
 @search_bp.route('', methods=['POST'])
 @jwt_required()
+@cached('cases', 'customers', 'investigations', 'targets')
 def advanced_search():
     """Advanced search across all entities"""
     data = request.get_json()
@@ -20,123 +69,187 @@ def advanced_search():
             'status': 'error'
         }), 400
     
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 10, type=int)
-    
     entities = data.get('entities', ['cases', 'customers', 'investigations', 'targets'])
     
+    if data.get('mode') == 'unified':
+        return _unified_search_response(data, entities)
+    
+    include_counts = 'counts' in parse_include()
+    
+    try:
+        facets = parse_facets(data.get('facets'))
+    except InvalidFacetsError as e:
+        return jsonify({
+            'message': str(e),
+            'status': 'error'
+        }), 400
+    
+    query_filters = {}
+    if data.get('query'):
+        try:
+            query_filters = compile_query(str(data['query']))
+        except QuerySyntaxError as e:
+            return jsonify({
+                'message': f'検索クエリが無効です。{e}',
+                'status': 'error'
+            }), 400
+    
     results = {
         'cases': [],
         'customers': [],
         'investigations': [],
         'targets': []
     }
+    pagination = {}
+    queries = {}
     
     if 'cases' in entities:
         case_filters = []
         
         if 'name' in data:
-            case_filters.append(Case.name.ilike(f"%{data['name']}%"))
+            case_filters.append(contains(Case.name, data['name']))
         if 'status' in data:
             case_filters.append(Case.status == data['status'])
         if 'description' in data:
-            case_filters.append(Case.description.ilike(f"%{data['description']}%"))
+            case_filters.append(contains(Case.description, data['description']))
+        
+        if 'cases' in query_filters:
+            case_filters.append(query_filters['cases'])
         
         if case_filters:
             cases_query = Case.query.filter(and_(*case_filters))
         else:
             cases_query = Case.query
         
-        cases_pagination = cases_query.paginate(page=page, per_page=per_page)
-        results['cases'] = [case.to_dict() for case in cases_pagination.items]
+        queries['cases'] = (cases_query, Case)
     
     if 'customers' in entities:
         customer_filters = []
         
         if 'name' in data:
-            customer_filters.append(Customer.name.ilike(f"%{data['name']}%"))
+            customer_filters.append(contains(Customer.name, data['name']))
         if 'email' in data:
-            customer_filters.append(Customer.email.ilike(f"%{data['email']}%"))
+            customer_filters.append(contains(Customer.email, data['email']))
         if 'phone' in data:
-            customer_filters.append(Customer.phone.ilike(f"%{data['phone']}%"))
+            customer_filters.append(contains(Customer.phone, data['phone']))
         if 'address' in data:
-            customer_filters.append(Customer.address.ilike(f"%{data['address']}%"))
+            customer_filters.append(contains(Customer.address, data['address']))
         if 'case_id' in data:
             customer_filters.append(Customer.case_id == data['case_id'])
         
+        if 'customers' in query_filters:
+            customer_filters.append(query_filters['customers'])
+        
         if customer_filters:
             customers_query = Customer.query.filter(and_(*customer_filters))
         else:
             customers_query = Customer.query
         
-        customers_pagination = customers_query.paginate(page=page, per_page=per_page)
-        results['customers'] = [customer.to_dict() for customer in customers_pagination.items]
+        queries['customers'] = (customers_query, Customer)
     
     if 'investigations' in entities:
         investigation_filters = []
         
         if 'title' in data:
-            investigation_filters.append(Investigation.title.ilike(f"%{data['title']}%"))
+            investigation_filters.append(contains(Investigation.title, data['title']))
         if 'status' in data:
             investigation_filters.append(Investigation.status == data['status'])
         if 'description' in data:
-            investigation_filters.append(Investigation.description.ilike(f"%{data['description']}%"))
+            investigation_filters.append(contains(Investigation.description, data['description']))
         if 'case_id' in data:
             investigation_filters.append(Investigation.case_id == data['case_id'])
         
+        if 'investigations' in query_filters:
+            investigation_filters.append(query_filters['investigations'])
+        
         if investigation_filters:
             investigations_query = Investigation.query.filter(and_(*investigation_filters))
         else:
             investigations_query = Investigation.query
         
-        investigations_pagination = investigations_query.paginate(page=page, per_page=per_page)
-        results['investigations'] = [investigation.to_dict() for investigation in investigations_pagination.items]
+        queries['investigations'] = (investigations_query, Investigation)
     
     if 'targets' in entities:
         target_filters = []
         
         if 'name' in data:
-            target_filters.append(Target.name.ilike(f"%{data['name']}%"))
+            target_filters.append(contains(Target.name, data['name']))
         if 'type' in data:
-            target_filters.append(Target.type.ilike(f"%{data['type']}%"))
+            target_filters.append(contains(Target.type, data['type']))
         if 'status' in data:
             target_filters.append(Target.status == data['status'])
         if 'details' in data:
-            target_filters.append(Target.details.ilike(f"%{data['details']}%"))
+            target_filters.append(contains(Target.details, data['details']))
         if 'investigation_id' in data:
             target_filters.append(Target.investigation_id == data['investigation_id'])
         
+        if 'targets' in query_filters:
+            target_filters.append(query_filters['targets'])
+        
         if target_filters:
             targets_query = Target.query.filter(and_(*target_filters))
         else:
             targets_query = Target.query
         
-        targets_pagination = targets_query.paginate(page=page, per_page=per_page)
-        results['targets'] = [target.to_dict() for target in targets_pagination.items]
+        queries['targets'] = (targets_query, Target)
     
     if 'cross_entity' in data and data['cross_entity']:
         if 'customer_name' in data and 'cases' in entities:
-            customer_case_ids = [c.case_id for c in Customer.query.filter(
-                Customer.name.ilike(f"%{data['customer_name']}%")
-            ).all()]
+            customer_match = related_exists(Case, Customer, contains(Customer.name, data['customer_name']))
             
-            if customer_case_ids:
-                cases_query = Case.query.filter(Case.id.in_(customer_case_ids))
-                cases_pagination = cases_query.paginate(page=page, per_page=per_page)
-                results['cases'] = [case.to_dict() for case in cases_pagination.items]
+            if db.session.query(customer_match).scalar():
+                cases_query = Case.query.filter(customer_match)
+                queries['cases'] = (cases_query, Case)
         
         if 'target_name' in data and 'investigations' in entities:
-            target_investigation_ids = [t.investigation_id for t in Target.query.filter(
-                Target.name.ilike(f"%{data['target_name']}%")
-            ).all()]
+            target_match = related_exists(Investigation, Target, contains(Target.name, data['target_name']))
             
-            if target_investigation_ids:
-                investigations_query = Investigation.query.filter(Investigation.id.in_(target_investigation_ids))
-                investigations_pagination = investigations_query.paginate(page=page, per_page=per_page)
-                results['investigations'] = [investigation.to_dict() for investigation in investigations_pagination.items]
+            if db.session.query(target_match).scalar():
+                investigations_query = Investigation.query.filter(target_match)
+                queries['investigations'] = (investigations_query, Investigation)
     
-    return jsonify({
+    tasks = [
+        partial(_search_entity, key, query, model, include_counts, facets)
+        for key, (query, model) in queries.items()
+    ]
+    facet_results = {}
+    for key, items, entity_pagination, entity_facets in run_concurrently(tasks):
+        results[key] = items
+        pagination[key] = entity_pagination
+        if entity_facets is not None:
+            facet_results[key] = entity_facets
+    
+    response = {
         'message': '検索結果を取得しました。',
         'status': 'success',
-        'results': results
+        'results': results,
+        'pagination': pagination
+    }
+    if facets:
+        response['facets'] = facet_results
+    
+    return jsonify(response), 200
+
+@search_bp.route('/suggest', methods=['GET'])
+@jwt_required()
+def suggest():
+    """Search-as-you-type suggestions served from the in-memory name index
+
+    Names changed by other workers show up within SUGGEST_SYNC_INTERVAL;
+    rows they delete keep being suggested until the next rebuild, up to
+    SUGGEST_REBUILD_INTERVAL, so callers must expect a suggested id to 404.
+    """
+    query = request.args.get('q', '')
+    limit = request.args.get('limit', 5, type=int)
+    
+    if not limit or limit < 1:
+        limit = 5
+    limit = min(limit, 20)
+    
+    suggest_index.refresh_if_stale()
+    
+    return jsonify({
+        'message': '候補を取得しました。',
+        'status': 'success',
+        'suggestions': suggest_index.search(query, limit)
     }), 200
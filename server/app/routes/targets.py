@@ -5,39 +5,36 @@ from app.models.target import Target
 from app.models.investigation import Investigation
 from app import db
 from app.utils.auth import admin_required
+from app.utils.http_cache import conditional
+from app.utils.pagination import paginate
+from app.utils.serialization import parse_fields, serialize_item, serialize_items, with_fields
 
 targets_bp = Blueprint('targets', __name__)
 
 @targets_bp.route('', methods=['GET'])
 @jwt_required()
+@conditional('targets')
 def get_targets():
     """Get all targets"""
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 10, type=int)
+    fields = parse_fields(Target)
+    targets, pagination = paginate(with_fields(Target.query, Target, fields), Target)
     
-    targets_pagination = Target.query.paginate(page=page, per_page=per_page)
-    
-    targets_data = [target.to_dict() for target in targets_pagination.items]
+    targets_data = serialize_items(targets, fields=fields)
     
     return jsonify({
         'message': 'ターゲット一覧を取得しました。',
         'status': 'success',
         'targets': targets_data,
-        'pagination': {
-            'total': targets_pagination.total,
-            'pages': targets_pagination.pages,
-            'page': page,
-            'per_page': per_page,
-            'has_next': targets_pagination.has_next,
-            'has_prev': targets_pagination.has_prev
-        }
+        'pagination': pagination
     }), 200
 
 @targets_bp.route('/<int:target_id>', methods=['GET'])
 @jwt_required()
+@conditional('targets')
 def get_target(target_id):
     """Get a specific target"""
-    target = Target.query.get(target_id)
+    fields = parse_fields(Target)
+    target = with_fields(Target.query, Target, fields).get(target_id)
     
     if not target:
         return jsonify({
@@ -48,7 +45,7 @@ def get_target(target_id):
     return jsonify({
         'message': 'ターゲットを取得しました。',
         'status': 'success',
-        'target': target.to_dict()
+        'target': serialize_item(target, fields)
     }), 200
 
 @targets_bp.route('', methods=['POST'])
@@ -154,6 +151,7 @@ def delete_target(target_id):
 
 @targets_bp.route('/investigation/<int:investigation_id>', methods=['GET'])
 @jwt_required()
+@conditional('investigations', 'targets')
 def get_targets_by_investigation(investigation_id):
     """Get targets for a specific investigation"""
     investigation = Investigation.query.get(investigation_id)
@@ -163,23 +161,14 @@ def get_targets_by_investigation(investigation_id):
             'status': 'error'
         }), 404
     
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 10, type=int)
-    
-    targets_pagination = Target.query.filter_by(investigation_id=investigation_id).paginate(page=page, per_page=per_page)
+    fields = parse_fields(Target)
+    targets, pagination = paginate(with_fields(Target.query.filter_by(investigation_id=investigation_id), Target, fields), Target)
     
-    targets_data = [target.to_dict() for target in targets_pagination.items]
+    targets_data = serialize_items(targets, fields=fields)
     
     return jsonify({
         'message': '調査のターゲット一覧を取得しました。',
         'status': 'success',
         'targets': targets_data,
-        'pagination': {
-            'total': targets_pagination.total,
-            'pages': targets_pagination.pages,
-            'page': page,
-            'per_page': per_page,
-            'has_next': targets_pagination.has_next,
-            'has_prev': targets_pagination.has_prev
-        }
+        'pagination': pagination
     }), 200
@@ -0,0 +1,231 @@
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import insert, select
+from sqlalchemy.exc import SQLAlchemyError
+from app import db
+from app.models.case import Case
+from app.models.customer import Customer
+from app.models.investigation import Investigation
+from app.models.target import Target
+from app.services.suggest import SUGGEST_SOURCES, record_changes
+from app.services.versions import record_writes
+
+# entity type -> model, parent (id field, entity type), required fields and message,
+# and writable fields with their defaults on create
+BATCH_ENTITIES = {
+    'cases': {
+        'model': Case,
+        'label': 'ケース',
+        'parent': None,
+        'required': ('name',),
+        'required_message': 'ケース名が必要です。',
+        'fields': {'name': None, 'description': '', 'status': 'open'},
+    },
+    'customers': {
+        'model': Customer,
+        'label': '顧客',
+        'parent': ('case_id', 'cases'),
+        'required': ('name', 'case_id'),
+        'required_message': '顧客名とケースIDが必要です。',
+        'fields': {'case_id': None, 'name': None, 'email': '', 'phone': '', 'address': ''},
+    },
+    'investigations': {
+        'model': Investigation,
+        'label': '調査',
+        'parent': ('case_id', 'cases'),
+        'required': ('title', 'case_id'),
+        'required_message': '調査タイトルとケースIDが必要です。',
+        'fields': {
+            'case_id': None, 'title': None, 'description': '', 'status': 'open',
+            'start_date': None, 'end_date': None,
+        },
+    },
+    'targets': {
+        'model': Target,
+        'label': 'ターゲット',
+        'parent': ('investigation_id', 'investigations'),
+        'required': ('name', 'investigation_id'),
+        'required_message': 'ターゲット名と調査IDが必要です。',
+        'fields': {
+            'investigation_id': None, 'name': None, 'type': '', 'details': '', 'status': 'open',
+        },
+    },
+}
+
+DATE_FIELDS = {'start_date': '開始日', 'end_date': '終了日'}
+
+OPERATIONS = ('create', 'update', 'delete')
+
+
+class BatchError(ValueError):
+    """Raised for an operation that cannot be run; the whole batch is rolled back"""
+
+    def __init__(self, index, message, status_code=400):
+        super().__init__(message)
+        self.index = index
+        self.status_code = status_code
+
+
+class _Batch:
+    def __init__(self, operations):
+        self.operations = operations
+        self.refs = {}  # ref -> (entity type, id)
+        self.results = [None] * len(operations)
+
+    def resolve(self, index, value, entity_type):
+        """Resolve an id, or a ``"$ref"`` to a row created earlier in the batch"""
+        if isinstance(value, str) and value.startswith('$'):
+            ref = self.refs.get(value[1:])
+            if ref is None:
+                raise BatchError(index, f'参照「{value}」が見つかりません。')
+            if ref[0] != entity_type:
+                raise BatchError(index, f'参照「{value}」は{BATCH_ENTITIES[entity_type]["label"]}ではありません。')
+            return ref[1]
+        if isinstance(value, bool) or not isinstance(value, int):
+            raise BatchError(index, f'ID「{value}」が無効です。')
+        return value
+
+    def values(self, index, entity, data, create):
+        """Writable column values of an operation, with defaults on create"""
+        fields = entity['fields']
+        values = dict(fields) if create else {}
+        for name in fields:
+            if name not in data:
+                continue
+            value = data[name]
+            if name in DATE_FIELDS:
+                try:
+                    value = datetime.strptime(value, '%Y-%m-%d').date() if value else None
+                except (TypeError, ValueError):
+                    raise BatchError(index, f'{DATE_FIELDS[name]}の形式が無効です。YYYY-MM-DD形式で入力してください。')
+            values[name] = value
+
+        if entity['parent'] and entity['parent'][0] in values:
+            field, parent_type = entity['parent']
+            values[field] = self.resolve(index, values[field], parent_type)
+        return values
+
+    def check_parents(self, entity, rows):
+        """Check in one query that the parents of (index, values) rows exist"""
+        field, parent_type = entity['parent']
+        parent = BATCH_ENTITIES[parent_type]
+        ids = {values[field] for _, values in rows}
+        found = set(db.session.scalars(select(parent['model'].id).where(parent['model'].id.in_(ids))))
+        for index, values in rows:
+            if values[field] not in found:
+                raise BatchError(index, f'指定された{parent["label"]}が見つかりません。', 404)
+
+    def create(self, entity_type, group):
+        """Insert a run of creates of one entity type with a single executemany"""
+        entity = BATCH_ENTITIES[entity_type]
+        rows = []
+        for index, operation in group:
+            data = operation.get('data') or {}
+            if not all(data.get(name) for name in entity['required']):
+                raise BatchError(index, entity['required_message'])
+            rows.append((index, self.values(index, entity, data, create=True)))
+        if entity['parent']:
+            self.check_parents(entity, rows)
+
+        model = entity['model']
+        ids = db.session.scalars(
+            insert(model).returning(model.id, sort_by_parameter_order=True),
+            [values for _, values in rows]
+        ).all()
+        # Bulk inserts do not go through the unit of work, so record the write here
+        record_writes(db.session, [model.__tablename__])
+
+        label_column = SUGGEST_SOURCES[entity_type][1]
+        record_changes(db.session, {
+            (entity_type, item_id): values[label_column.key] for item_id, (_, values) in zip(ids, rows)
+        })
+        for item_id, (index, operation) in zip(ids, group):
+            self.result(index, operation, item_id)
+
+    def load(self, index, entity_type, operation):
+        entity = BATCH_ENTITIES[entity_type]
+        item = db.session.get(entity['model'], self.resolve(index, operation.get('id'), entity_type))
+        if not item:
+            raise BatchError(index, f'{entity["label"]}が見つかりません。', 404)
+        return item
+
+    def update(self, index, entity_type, operation):
+        entity = BATCH_ENTITIES[entity_type]
+        item = self.load(index, entity_type, operation)
+        data = operation.get('data') or {}
+        if any(name in data and not data[name] for name in entity['required']):
+            raise BatchError(index, entity['required_message'])
+        values = self.values(index, entity, data, create=False)
+        if entity['parent'] and entity['parent'][0] in values:
+            self.check_parents(entity, [(index, values)])
+        for name, value in values.items():
+            setattr(item, name, value)
+        self.result(index, operation, item.id)
+
+    def delete(self, index, entity_type, operation):
+        item = self.load(index, entity_type, operation)
+        db.session.delete(item)
+        self.result(index, operation, item.id)
+
+    def result(self, index, operation, item_id):
+        result = {'index': index, 'op': operation['op'], 'entity': operation['entity'], 'id': item_id}
+        if operation.get('ref'):
+            result['ref'] = operation['ref']
+            self.refs[operation['ref']] = (operation['entity'], item_id)
+        self.results[index] = result
+
+    def groups(self):
+        """Validate operations and group consecutive creates of the same entity type"""
+        groups = []
+        refs = set()
+        for index, operation in enumerate(self.operations):
+            if not isinstance(operation, dict):
+                raise BatchError(index, '操作の形式が無効です。')
+            if operation.get('op') not in OPERATIONS:
+                raise BatchError(index, f'操作「{operation.get("op")}」は無効です。')
+            if operation.get('entity') not in BATCH_ENTITIES:
+                raise BatchError(index, f'エンティティ「{operation.get("entity")}」は無効です。')
+            if operation.get('data') is not None and not isinstance(operation['data'], dict):
+                raise BatchError(index, 'データの形式が無効です。')
+            if operation.get('ref'):
+                if not isinstance(operation['ref'], str):
+                    raise BatchError(index, '参照名は文字列で指定してください。')
+                if operation['op'] != 'create':
+                    raise BatchError(index, '参照名は作成操作にのみ指定できます。')
+                if operation['ref'] in refs:
+                    raise BatchError(index, f'参照名「{operation["ref"]}」が重複しています。')
+                refs.add(operation['ref'])
+
+            if (operation['op'] == 'create' and groups and groups[-1][0] == 'create'
+                    and groups[-1][1] == operation['entity']):
+                groups[-1][2].append((index, operation))
+            else:
+                groups.append((operation['op'], operation['entity'], [(index, operation)]))
+        return groups
+
+    def run(self):
+        for op, entity_type, group in self.groups():
+            index, operation = group[0]
+            try:
+                if op == 'create':
+                    self.create(entity_type, group)
+                else:
+                    getattr(self, op)(index, entity_type, operation)
+                # Flush each operation so a database error names the one that caused it
+                db.session.flush()
+            except SQLAlchemyError as e:
+                current_app.logger.warning('Batch operation %s failed', index, exc_info=True)
+                raise BatchError(index, 'データベースへの書き込みに失敗しました。') from e
+        return self.results
+
+
+def run_batch(operations):
+    """Run create/update/delete operations in order in the current transaction
+
+    Consecutive creates of one entity type are inserted with a single
+    executemany. A create may name itself with ``ref``, and later operations
+    refer to its id as ``"$<ref>"`` in ``id`` or a parent id field. Returns
+    one result per operation; the caller commits, or rolls back on BatchError,
+    which database errors are raised as too, with the failing operation's index.
+    """
+    return _Batch(operations).run()
@@ -0,0 +1,50 @@
+from sqlalchemy.orm import selectinload
+from app import db
+from app.models.case import Case
+from app.models.investigation import Investigation
+
+MAX_TREE_DEPTH = 2
+
+
+def load_case_tree(case_id, depth=MAX_TREE_DEPTH):
+    """Load a case with its hierarchy as a dictionary, or None if it does not exist
+
+    ``depth`` 0 is the case alone, 1 adds its customers and investigations,
+    2 also adds each investigation's targets. Each level is loaded with one
+    selectinload query, so the number of queries does not grow with the
+    number of children; counts come from the loaded collections where possible.
+    """
+    options = []
+    if depth >= 1:
+        options += [selectinload(Case.customers), selectinload(Case.investigations)]
+    if depth >= 2:
+        options.append(selectinload(Case.investigations).selectinload(Investigation.targets))
+
+    case = db.session.get(Case, case_id, options=options)
+    if not case:
+        return None
+
+    if depth == 0:
+        return case.to_dict()
+
+    tree = case.to_dict(counts={
+        'customer_count': len(case.customers),
+        'investigation_count': len(case.investigations),
+    })
+    tree['customers'] = [customer.to_dict() for customer in case.customers]
+
+    if depth == 1:
+        counts = Investigation.child_counts([investigation.id for investigation in case.investigations])
+        tree['investigations'] = [
+            investigation.to_dict(counts=counts[investigation.id]) for investigation in case.investigations
+        ]
+        return tree
+
+    tree['investigations'] = [
+        dict(
+            investigation.to_dict(counts={'target_count': len(investigation.targets)}),
+            targets=[target.to_dict() for target in investigation.targets]
+        )
+        for investigation in case.investigations
+    ]
+    return tree
@@ -0,0 +1,102 @@
+import csv
+import io
+import json
+import zlib
+from collections import defaultdict
+from sqlalchemy import select
+from app import db
+from app.models.case import Case
+from app.models.customer import Customer
+from app.models.investigation import Investigation
+from app.models.target import Target
+
+# format -> mimetype
+EXPORT_FORMATS = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+
+# One CSV row per record; parent_id is the case id, or the investigation id for targets
+CSV_COLUMNS = [
+    'record_type', 'id', 'parent_id', 'name', 'description', 'status', 'email', 'phone',
+    'address', 'type', 'details', 'start_date', 'end_date', 'created_at', 'updated_at',
+]
+
+
+def _children(model, parent_column, parent_ids):
+    """Load the children of a chunk of parents with one IN query, grouped by parent id"""
+    grouped = defaultdict(list)
+    if parent_ids:
+        query = select(model).where(parent_column.in_(parent_ids)).order_by(parent_column, model.id)
+        for item in db.session.scalars(query):
+            grouped[getattr(item, parent_column.key)].append(item)
+    return grouped
+
+
+def iter_case_trees(chunk_size):
+    """Yield lists of case dictionaries with nested customers, investigations and targets
+
+    Cases are read with yield_per (a server-side cursor on PostgreSQL), and
+    the children of each chunk of cases are loaded with one query per table,
+    so memory use is bounded by the chunk size rather than the table size.
+    """
+    result = db.session.scalars(
+        select(Case).order_by(Case.id).execution_options(yield_per=chunk_size)
+    )
+    for cases in result.partitions():
+        case_ids = [case.id for case in cases]
+        customers = _children(Customer, Customer.case_id, case_ids)
+        investigations = _children(Investigation, Investigation.case_id, case_ids)
+        targets = _children(
+            Target, Target.investigation_id,
+            [investigation.id for items in investigations.values() for investigation in items]
+        )
+
+        trees = []
+        for case in cases:
+            tree = case.to_dict(include_counts=False)
+            tree['customers'] = [customer.to_dict() for customer in customers.get(case.id, [])]
+            tree['investigations'] = [
+                dict(
+                    investigation.to_dict(include_counts=False),
+                    targets=[target.to_dict() for target in targets.get(investigation.id, [])]
+                )
+                for investigation in investigations.get(case.id, [])
+            ]
+            trees.append(tree)
+        yield trees
+
+
+def _csv_records(tree):
+    yield dict(tree, record_type='case')
+    for customer in tree['customers']:
+        yield dict(customer, record_type='customer', parent_id=customer['case_id'])
+    for investigation in tree['investigations']:
+        yield dict(investigation, record_type='investigation', parent_id=investigation['case_id'], name=investigation['title'])
+        for target in investigation['targets']:
+            yield dict(target, record_type='target', parent_id=target['investigation_id'])
+
+
+def export_case_trees(fmt, chunk_size):
+    """Yield the export as text chunks, one chunk per chunk of cases"""
+    if fmt == 'csv':
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, CSV_COLUMNS, extrasaction='ignore')
+        writer.writeheader()
+        for trees in iter_case_trees(chunk_size):
+            for tree in trees:
+                writer.writerows(_csv_records(tree))
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+        return
+
+    for trees in iter_case_trees(chunk_size):
+        yield ''.join(json.dumps(tree, ensure_ascii=False) + '\n' for tree in trees)
+
+
+def gzip_chunks(chunks):
+    """Gzip a stream of text chunks, flushing after each so bytes go out right away"""
+    compressor = zlib.compressobj(wbits=31)
+    for chunk in chunks:
+        yield compressor.compress(chunk.encode('utf-8')) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
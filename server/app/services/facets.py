@@ -0,0 +1,83 @@
+from sqlalchemy import func
+from app import db
+from app.models.case import Case
+from app.models.customer import Customer
+from app.models.investigation import Investigation
+from app.models.target import Target
+
+# entity type -> facet name -> grouped column
+FACETS = {
+    'cases': {'status': Case.status},
+    'customers': {'case_id': Customer.case_id},
+    'investigations': {'status': Investigation.status, 'case_id': Investigation.case_id},
+    'targets': {
+        'status': Target.status,
+        'type': Target.type,
+        'investigation_id': Target.investigation_id,
+        'case_id': Investigation.case_id,
+    },
+}
+
+# Facets on a column of a parent table, as (entity type, facet) -> (parent, join condition)
+FACET_JOINS = {
+    ('targets', 'case_id'): (Investigation, Target.investigation_id == Investigation.id),
+}
+
+
+class InvalidFacetsError(ValueError):
+    """Raised when the requested facets are not a list of names"""
+
+
+def parse_facets(value):
+    """Get the facet names of a search request: a list of names or a comma separated string"""
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [name.strip() for name in value.split(',') if name.strip()]
+    if not isinstance(value, list) or not all(isinstance(name, str) for name in value):
+        raise InvalidFacetsError('ファセットは名前のリストで指定してください。')
+    return value
+
+
+def _buckets(rows):
+    return [
+        {'value': value, 'count': count}
+        for value, count in sorted(rows, key=lambda row: (-row[1], str(row[0])))
+    ]
+
+
+def facet_counts(query, entity_type, names):
+    """Count the rows of a filtered entity query per value of each requested facet
+
+    On PostgreSQL all facets come from one GROUPING SETS query; other
+    databases run one GROUP BY per facet. Unknown facet names are ignored.
+    """
+    columns = {name: FACETS[entity_type][name] for name in names if name in FACETS.get(entity_type, {})}
+    if not columns:
+        return {}
+
+    query = query.order_by(None)
+    for name in columns:
+        if (entity_type, name) in FACET_JOINS:
+            query = query.outerjoin(*FACET_JOINS[(entity_type, name)])
+
+    if len(columns) == 1 or db.engine.dialect.name != 'postgresql':
+        return {
+            name: _buckets(query.with_entities(column, func.count()).group_by(column).all())
+            for name, column in columns.items()
+        }
+
+    names = list(columns)
+    rows = query.with_entities(
+        *[func.grouping(columns[name]) for name in names],
+        *columns.values(),
+        func.count()
+    ).group_by(func.grouping_sets(*columns.values())).all()
+
+    grouped = {name: [] for name in names}
+    for row in rows:
+        flags, values, count = row[:len(names)], row[len(names):-1], row[-1]
+        for name, flag, value in zip(names, flags, values):
+            if flag == 0:
+                grouped[name].append((value, count))
+    return {name: _buckets(entries) for name, entries in grouped.items()}
@@ -0,0 +1,101 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from flask import current_app
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+_executor = None
+_executor_pid = None
+_slots = None
+_executor_lock = threading.Lock()
+
+
+class HashingBusyError(RuntimeError):
+    """Raised when the password hashing pool is at capacity"""
+
+
+def canonical_method(method):
+    """Expand a werkzeug hash method to the full form stored in hashes
+
+    e.g. ``scrypt`` -> ``scrypt:32768:8:1``, ``pbkdf2`` -> ``pbkdf2:sha256:<iterations>``
+    """
+    name, *args = method.split(':')
+    if name == 'scrypt':
+        defaults = ['32768', '8', '1']
+    elif name == 'pbkdf2':
+        defaults = ['sha256', str(DEFAULT_PBKDF2_ITERATIONS)]
+    else:
+        return method
+    return ':'.join([name] + args + defaults[len(args):])
+
+
+def needs_rehash(password_hash):
+    """Check whether a stored hash was made with a different hash policy"""
+    method = password_hash.split('$', 1)[0]
+    return method != canonical_method(current_app.config['PASSWORD_HASH_METHOD'])
+
+
+def _get_executor(workers, max_pending):
+    global _executor, _executor_pid, _slots
+    with _executor_lock:
+        # A pool inherited through fork (e.g. gunicorn --preload) is not usable
+        if _executor is None or _executor_pid != os.getpid():
+            # Forking a process with running threads can copy a lock that one of
+            # them holds and deadlock the child; forkserver starts clean ones
+            _executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('forkserver'))
+            _executor_pid = os.getpid()
+            _slots = threading.BoundedSemaphore(max_pending)
+        return _executor, _slots
+
+
+def _discard_executor(executor):
+    """Drop a pool whose process died, so the next call starts a new one"""
+    global _executor
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _run(fn, *args):
+    """Run a hashing function on the bounded process pool
+
+    Raises HashingBusyError instead of queueing when PASSWORD_HASH_MAX_PENDING
+    calls are already in flight, when the result takes longer than
+    PASSWORD_HASH_TIMEOUT, or when a pool process died; the broken pool is
+    then replaced on the next call.
+    """
+    config = current_app.config
+    if config['PASSWORD_HASH_WORKERS'] <= 0:
+        return fn(*args)
+
+    executor, slots = _get_executor(config['PASSWORD_HASH_WORKERS'], config['PASSWORD_HASH_MAX_PENDING'])
+    if not slots.acquire(blocking=False):
+        raise HashingBusyError('ログインが混み合っています。しばらくしてから再試行してください。')
+
+    try:
+        future = executor.submit(fn, *args)
+    except BrokenProcessPool as e:
+        slots.release()
+        _discard_executor(executor)
+        raise HashingBusyError('ログインが混み合っています。しばらくしてから再試行してください。') from e
+    future.add_done_callback(lambda _: slots.release())
+    try:
+        return future.result(timeout=config['PASSWORD_HASH_TIMEOUT'])
+    except TimeoutError as e:
+        raise HashingBusyError('ログインが混み合っています。しばらくしてから再試行してください。') from e
+    except BrokenProcessPool as e:
+        _discard_executor(executor)
+        raise HashingBusyError('ログインが混み合っています。しばらくしてから再試行してください。') from e
+
+
+def hash_password(password):
+    """Hash a password with the configured hash policy"""
+    return _run(generate_password_hash, password, current_app.config['PASSWORD_HASH_METHOD'])
+
+
+def verify_password(password_hash, password):
+    """Check a password against a stored hash"""
+    return _run(check_password_hash, password_hash, password)
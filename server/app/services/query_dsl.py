@@ -0,0 +1,281 @@
+"""Structured search queries for /api/search
+
+Syntax (Lucene-like)::
+
+    status:open AND (name:鈴木 OR email:*example.com) AND created_at:[2026-01-01 TO *]
+
+* ``field:value`` - substring match on text fields, equality otherwise;
+  ``*`` wildcards anchor the match (``*example.com``, ``web*``)
+* ``field:"quoted value"`` - values containing spaces
+* ``field:[a TO b]`` / ``field:{a TO b}`` - inclusive / exclusive ranges,
+  ``*`` for an open bound
+* ``AND``, ``OR``, ``NOT`` and parentheses; juxtaposed clauses are ANDed
+* a value without a field matches any of the entity's main text fields
+
+A clause on a field an entity does not have is false for that entity.
+"""
+import re
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from sqlalchemy import and_, false, not_, or_
+from app.models.case import Case
+from app.models.customer import Customer
+from app.models.investigation import Investigation
+from app.models.target import Target
+from app.services.search import contains, escape_like, use_ngram_index
+
+# entity type -> field name -> (column, kind)
+ENTITY_FIELDS = {
+    'cases': {
+        'id': (Case.id, 'integer'),
+        'name': (Case.name, 'text'),
+        'description': (Case.description, 'text'),
+        'status': (Case.status, 'keyword'),
+        'created_at': (Case.created_at, 'datetime'),
+        'updated_at': (Case.updated_at, 'datetime'),
+    },
+    'customers': {
+        'id': (Customer.id, 'integer'),
+        'case_id': (Customer.case_id, 'integer'),
+        'name': (Customer.name, 'text'),
+        'email': (Customer.email, 'text'),
+        'phone': (Customer.phone, 'text'),
+        'address': (Customer.address, 'text'),
+        'created_at': (Customer.created_at, 'datetime'),
+        'updated_at': (Customer.updated_at, 'datetime'),
+    },
+    'investigations': {
+        'id': (Investigation.id, 'integer'),
+        'case_id': (Investigation.case_id, 'integer'),
+        'title': (Investigation.title, 'text'),
+        'description': (Investigation.description, 'text'),
+        'status': (Investigation.status, 'keyword'),
+        'start_date': (Investigation.start_date, 'date'),
+        'end_date': (Investigation.end_date, 'date'),
+        'created_at': (Investigation.created_at, 'datetime'),
+        'updated_at': (Investigation.updated_at, 'datetime'),
+    },
+    'targets': {
+        'id': (Target.id, 'integer'),
+        'investigation_id': (Target.investigation_id, 'integer'),
+        'name': (Target.name, 'text'),
+        'type': (Target.type, 'text'),
+        'details': (Target.details, 'text'),
+        'status': (Target.status, 'keyword'),
+        'created_at': (Target.created_at, 'datetime'),
+        'updated_at': (Target.updated_at, 'datetime'),
+    },
+}
+
+# Fields searched by a value given without a field name
+DEFAULT_FIELDS = {
+    'cases': ['name', 'description'],
+    'customers': ['name', 'email', 'phone', 'address'],
+    'investigations': ['title', 'description'],
+    'targets': ['name', 'type', 'details'],
+}
+
+OPERATORS = ('AND', 'OR', 'NOT')
+
+_TOKEN_RE = re.compile(r'''
+    \s*(?:
+        (?P<paren>[()])
+      | (?P<rfield>\w+):(?P<open>[\[{])\s*(?P<lo>[^\s\]}]+)\s+TO\s+(?P<hi>[^\s\]}]+)\s*(?P<close>[\]}])
+      | (?:(?P<field>\w+):)?(?:"(?P<quoted>[^"]*)"|(?P<word>[^\s()"]+))
+    )
+''', re.VERBOSE)
+
+
+class QuerySyntaxError(ValueError):
+    """Raised when a search query cannot be parsed or compiled"""
+
+
+def tokenize(text):
+    """Split a query into tokens: operators, parentheses, ranges and terms"""
+    tokens = []
+    position = 0
+    text = text.strip()
+    while position < len(text):
+        match = _TOKEN_RE.match(text, position)
+        if not match or match.end() == position:
+            raise QuerySyntaxError(f'{position + 1}文字目付近を解析できません。')
+        position = match.end()
+
+        if match.group('paren'):
+            tokens.append(('paren', match.group('paren')))
+        elif match.group('rfield'):
+            tokens.append(('range', match.group('rfield'), match.group('lo'), match.group('hi'),
+                           match.group('open') == '[', match.group('close') == ']'))
+        elif match.group('field') is None and match.group('word') in OPERATORS:
+            tokens.append(('op', match.group('word')))
+        else:
+            value = match.group('quoted') if match.group('quoted') is not None else match.group('word')
+            tokens.append(('term', match.group('field'), value))
+    return tokens
+
+
+def _token_text(token):
+    if token[0] in ('paren', 'op'):
+        return token[1]
+    if token[0] == 'range':
+        _, field, lo, hi, include_lo, include_hi = token
+        return f"{field}:{'[' if include_lo else '{'}{lo} TO {hi}{']' if include_hi else '}'}"
+    _, field, value = token
+    value = f'"{value}"' if not value or re.search(r'[\s()"]', value) or value in OPERATORS else value
+    return f'{field}:{value}' if field else value
+
+
+def normalize_query(text):
+    """Canonical form of a query, used as the compiled-plan cache key"""
+    return ' '.join(_token_text(token) for token in tokenize(text))
+
+
+class _Parser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.position = 0
+
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def take(self):
+        token = self.peek()
+        self.position += 1
+        return token
+
+    def parse(self):
+        if not self.tokens:
+            raise QuerySyntaxError('検索クエリが空です。')
+        node = self.parse_or()
+        if self.peek() is not None:
+            raise QuerySyntaxError('括弧の対応が正しくありません。')
+        return node
+
+    def parse_or(self):
+        nodes = [self.parse_and()]
+        while self.peek() == ('op', 'OR'):
+            self.take()
+            nodes.append(self.parse_and())
+        return nodes[0] if len(nodes) == 1 else ('or', nodes)
+
+    def parse_and(self):
+        nodes = [self.parse_not()]
+        while True:
+            token = self.peek()
+            if token == ('op', 'AND'):
+                self.take()
+            elif token is None or token == ('op', 'OR') or token == ('paren', ')'):
+                break
+            nodes.append(self.parse_not())
+        return nodes[0] if len(nodes) == 1 else ('and', nodes)
+
+    def parse_not(self):
+        if self.peek() == ('op', 'NOT'):
+            self.take()
+            return ('not', self.parse_not())
+        return self.parse_atom()
+
+    def parse_atom(self):
+        token = self.take()
+        if token is None:
+            raise QuerySyntaxError('検索クエリが途中で終わっています。')
+        if token == ('paren', '('):
+            node = self.parse_or()
+            if self.take() != ('paren', ')'):
+                raise QuerySyntaxError('括弧の対応が正しくありません。')
+            return node
+        if token[0] in ('term', 'range'):
+            return token
+        raise QuerySyntaxError(f'「{token[1]}」の位置が正しくありません。')
+
+
+def parse_query(text):
+    """Parse a query into a tree of ('and'|'or', [...]), ('not', node) and tokens"""
+    return _Parser(tokenize(text)).parse()
+
+
+def _parse_scalar(value, kind, upper=False):
+    """Convert a query value to a column value; date-only upper datetime bounds move to the next day"""
+    try:
+        if kind == 'integer':
+            return int(value)
+        if kind == 'date':
+            return date.fromisoformat(value)
+        if kind == 'datetime':
+            if 'T' in value or ' ' in value:
+                return datetime.fromisoformat(value)
+            day = datetime.combine(date.fromisoformat(value), time.min)
+            return day + timedelta(days=1) if upper else day
+    except ValueError as e:
+        raise QuerySyntaxError(f'値「{value}」の形式が無効です。') from e
+    return value
+
+
+def _wildcard(column, value):
+    pattern = '%'.join(escape_like(part) for part in value.split('*'))
+    clause = column.ilike(pattern, escape='\\')
+    longest = max(value.split('*'), key=len)
+    if len(longest) >= 2:
+        # The substring filter lets the bigram index narrow the candidates
+        clause = and_(contains(column, longest), clause)
+    return clause
+
+
+def _match(column, kind, value):
+    if value == '*':
+        return column.isnot(None)
+    if kind in ('text', 'keyword') and '*' in value:
+        return _wildcard(column, value)
+    if kind == 'text':
+        return contains(column, value)
+    if kind == 'datetime' and 'T' not in value and ' ' not in value:
+        return and_(column >= _parse_scalar(value, kind), column < _parse_scalar(value, kind, upper=True))
+    return column == _parse_scalar(value, kind)
+
+
+def _range(column, kind, lo, hi, include_lo, include_hi):
+    clauses = []
+    if lo != '*':
+        bound = _parse_scalar(lo, kind, upper=not include_lo)
+        date_only = kind == 'datetime' and 'T' not in lo and ' ' not in lo
+        clauses.append(column >= bound if include_lo or date_only else column > bound)
+    if hi != '*':
+        bound = _parse_scalar(hi, kind, upper=include_hi)
+        date_only = kind == 'datetime' and 'T' not in hi and ' ' not in hi
+        clauses.append(column < bound if not include_hi or date_only else column <= bound)
+    return and_(*clauses) if clauses else column.isnot(None)
+
+
+def _compile_node(node, entity_type):
+    fields = ENTITY_FIELDS[entity_type]
+    kind = node[0]
+
+    if kind == 'and':
+        return and_(*[_compile_node(child, entity_type) for child in node[1]])
+    if kind == 'or':
+        return or_(*[_compile_node(child, entity_type) for child in node[1]])
+    if kind == 'not':
+        return not_(_compile_node(node[1], entity_type))
+
+    field = node[1]
+    if kind == 'term' and field is None:
+        return or_(*[_match(*fields[name], node[2]) for name in DEFAULT_FIELDS[entity_type]])
+    if field not in fields:
+        return false()
+    if kind == 'range':
+        return _range(*fields[field], *node[2:])
+    return _match(*fields[field], node[2])
+
+
+@lru_cache(maxsize=256)
+def _compile_normalized(normalized, ngram_index):
+    tree = parse_query(normalized)
+    return {entity_type: _compile_node(tree, entity_type) for entity_type in ENTITY_FIELDS}
+
+
+def compile_query(text):
+    """Compile a query into one SQLAlchemy filter expression per entity type
+
+    Compiled plans are cached by the normalized query string.
+    """
+    return _compile_normalized(normalize_query(text), use_ngram_index())
@@ -0,0 +1,58 @@
+import threading
+import time
+from flask import current_app
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from app import db
+from app.services.revocation import revocation_list
+from app.services.suggest import suggest_index
+from app.utils.db_pool import warm_pool
+
+_warmed = threading.Event()
+
+
+def warm_up():
+    """Load this process's in-memory indexes and open its pooled connections"""
+    # Every authenticated request checks the revocation list, so it goes first
+    revocation_list.refresh_if_stale()
+    suggest_index.refresh_if_stale()
+    warm_pool(db.engine, current_app.config['DB_POOL_SIZE'])
+    _warmed.set()
+
+
+def warm_up_in_background(app):
+    """Warm this process up on a background thread, retrying while the database is unavailable
+
+    Called when a server process starts. Building the indexes of large
+    tables can outlast the worker timeout, so the process serves requests
+    meanwhile and /readyz reports 503 until it is done.
+    """
+    def run():
+        with app.app_context():
+            while True:
+                try:
+                    warm_up()
+                    app.logger.info('Warm-up finished')
+                    return
+                except (SQLAlchemyError, OSError):
+                    app.logger.warning('Warm-up failed; retrying in %s seconds',
+                                       app.config['WARM_UP_RETRY_INTERVAL'], exc_info=True)
+                time.sleep(app.config['WARM_UP_RETRY_INTERVAL'])
+
+    threading.Thread(target=run, name='warm-up', daemon=True).start()
+
+
+def is_warm():
+    """Whether this process has finished warming up"""
+    return _warmed.is_set()
+
+
+def database_answers():
+    """Check that the database answers a trivial query"""
+    try:
+        with db.engine.connect() as connection:
+            connection.execute(text('SELECT 1'))
+    except (SQLAlchemyError, OSError):
+        current_app.logger.warning('Readiness check failed', exc_info=True)
+        return False
+    return True
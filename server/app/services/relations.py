@@ -0,0 +1,49 @@
+from collections import deque
+from sqlalchemy import exists
+from app.models.case import Case
+from app.models.customer import Customer
+from app.models.investigation import Investigation
+from app.models.target import Target
+
+# Foreign key links between directly related entities, as (child, parent)
+LINKS = {
+    (Customer, Case): Customer.case_id == Case.id,
+    (Investigation, Case): Investigation.case_id == Case.id,
+    (Target, Investigation): Target.investigation_id == Investigation.id,
+}
+
+_NEIGHBOURS = {}
+for _child, _parent in LINKS:
+    _NEIGHBOURS.setdefault(_child, []).append(_parent)
+    _NEIGHBOURS.setdefault(_parent, []).append(_child)
+
+
+def _link(a, b):
+    return LINKS.get((a, b), LINKS.get((b, a)))
+
+
+def find_path(model, related_model):
+    """Get the chain of models joining ``model`` to ``related_model``"""
+    paths = {model: [model]}
+    queue = deque([model])
+    while queue:
+        current = queue.popleft()
+        if current is related_model:
+            return paths[current]
+        for neighbour in _NEIGHBOURS.get(current, []):
+            if neighbour not in paths:
+                paths[neighbour] = paths[current] + [neighbour]
+                queue.append(neighbour)
+    raise ValueError(f'{model.__name__} is not related to {related_model.__name__}')
+
+
+def related_exists(model, related_model, *criteria):
+    """EXISTS clause matching ``model`` rows with a related row meeting ``criteria``
+
+    Works for any pair of entities (e.g. Case/Target through Investigation),
+    so the match is evaluated as a semi-join inside the database instead of
+    loading the related rows.
+    """
+    path = find_path(model, related_model)
+    conditions = [_link(a, b) for a, b in zip(path, path[1:])]
+    return exists().where(*conditions, *criteria)
@@ -0,0 +1,254 @@
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlparse
+from flask import current_app
+
+
+class LocalCache:
+    """In-process LRU bounded by entry count and total bytes"""
+
+    def __init__(self, max_entries, max_bytes):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                self._pop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl):
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            self._pop(key)
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._bytes += len(value)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._pop(next(iter(self._entries)))
+
+    def _pop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[1])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+class FileCache:
+    """Shared cache in a directory, one file per key; usable by all workers on a host
+
+    Every write makes a new key, so files are removed here rather than
+    overwritten: expired ones on read, and on a sweep at most every
+    ``sweep_interval`` seconds, which also drops the oldest files while the
+    directory holds more than ``max_bytes``. A file's mtime is set to its
+    expiry time, so the sweep only needs to stat the files.
+    """
+
+    def __init__(self, directory, max_bytes, sweep_interval=60):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.sweep_interval = sweep_interval
+        self._swept_at = time.monotonic()
+        self._sweep_lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key)
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                expires_at, value = f.read().split(b'\n', 1)
+        except (FileNotFoundError, ValueError):
+            return None
+        if float(expires_at) <= time.time():
+            self._remove(path)
+            return None
+        return value
+
+    def set(self, key, value, ttl):
+        expires_at = time.time() + ttl
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix='.')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(f'{expires_at}\n'.encode('ascii') + value)
+        os.utime(temp_path, (expires_at, expires_at))
+        os.replace(temp_path, self._path(key))
+        if time.monotonic() - self._swept_at >= self.sweep_interval:
+            self.sweep()
+
+    def sweep(self):
+        """Remove expired files, then the soonest to expire while over ``max_bytes``"""
+        if not self._sweep_lock.acquire(blocking=False):
+            return
+        try:
+            self._swept_at = time.monotonic()
+            now = time.time()
+            files = []
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if entry.name.startswith('.'):
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    if stat.st_mtime <= now:
+                        self._remove(entry.path)
+                    else:
+                        files.append((stat.st_mtime, stat.st_size, entry.path))
+            total = sum(size for _, size, _ in files)
+            for _, size, path in sorted(files):
+                if total <= self.max_bytes:
+                    break
+                self._remove(path)
+                total -= size
+        finally:
+            self._sweep_lock.release()
+
+
+class RedisCache:
+    """Shared cache on a Redis-protocol server (requires the ``redis`` package)"""
+
+    def __init__(self, url):
+        import redis
+        self.client = redis.Redis.from_url(url)
+
+    def get(self, key):
+        return self.client.get(f'assesshub:response:{key}')
+
+    def set(self, key, value, ttl):
+        self.client.set(f'assesshub:response:{key}', value, ex=max(int(ttl), 1))
+
+
+def shared_backend(url, max_bytes):
+    """Create the shared cache tier for RESPONSE_CACHE_URL, or None
+
+    ``max_bytes`` bounds a file tier; a Redis server is bounded by its own
+    maxmemory policy.
+    """
+    if not url:
+        return None
+    scheme = urlparse(url).scheme
+    if scheme == 'file':
+        return FileCache(urlparse(url).path, max_bytes)
+    if scheme in ('redis', 'rediss', 'unix'):
+        return RedisCache(url)
+    raise ValueError(f'Unsupported RESPONSE_CACHE_URL: {url}')
+
+
+class _Flight:
+    """A computation in progress that concurrent misses on its key wait for"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+
+
+class ResponseCache:
+    """Two-tier cache of serialized responses with single-flight computation
+
+    Lookups go to the local LRU, then to the optional shared tier, which
+    lets gunicorn workers reuse each other's results. Keys embed the change
+    versions of the tables a response is built from, so entries never need
+    invalidating; a write moves readers on to new keys. Concurrent misses on
+    one key within a worker share a single computation.
+    """
+
+    def __init__(self):
+        self._local = None
+        self._shared = None
+        self._configured = False
+        self._config_lock = threading.Lock()
+        self._flights = {}
+        self._flights_lock = threading.Lock()
+
+    def _configure(self):
+        with self._config_lock:
+            if not self._configured:
+                config = current_app.config
+                self._local = LocalCache(config['RESPONSE_CACHE_SIZE'], config['RESPONSE_CACHE_MAX_BYTES'])
+                self._shared = shared_backend(config['RESPONSE_CACHE_URL'], config['RESPONSE_CACHE_MAX_BYTES'])
+                self._configured = True
+
+    def get(self, key):
+        if not self._configured:
+            self._configure()
+        value = self._local.get(key)
+        if value is None and self._shared is not None:
+            try:
+                value = self._shared.get(key)
+            except Exception:
+                current_app.logger.exception('Shared response cache read failed')
+                return None
+            if value is not None:
+                self._local.set(key, value, current_app.config['RESPONSE_CACHE_TTL'])
+        return value
+
+    def set(self, key, value):
+        ttl = current_app.config['RESPONSE_CACHE_TTL']
+        self._local.set(key, value, ttl)
+        if self._shared is not None:
+            try:
+                self._shared.set(key, value, ttl)
+            except Exception:
+                current_app.logger.exception('Shared response cache write failed')
+
+    def get_or_compute(self, key, compute):
+        """Get a cached value, or compute it and store it unless compute returns None
+
+        Concurrent misses on one key wait for the first one's computation.
+        If that produced nothing to cache, they compute their own values in
+        parallel instead of queueing up behind each other.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        with self._flights_lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            flight.done.wait()
+            return flight.value if flight.value is not None else compute()
+
+        try:
+            flight.value = compute()
+            if flight.value is not None:
+                self.set(key, flight.value)
+            return flight.value
+        finally:
+            with self._flights_lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def clear(self):
+        """Drop the local tier"""
+        if self._local is not None:
+            self._local.clear()
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,176 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import event
+from app import db
+from app.models.revoked_token import RevokedToken
+from app.utils.bloom import BloomFilter
+
+
+class RevocationList:
+    """Per-worker view of revoked tokens
+
+    Single-token revocations go into a Bloom filter: a jti that is not in it
+    is certainly not revoked, so the database is only consulted on a filter
+    hit. User-wide revocations are few and kept exactly, as the latest
+    revocation time per user, so checking them needs no query. New
+    revocations are read by revoked_at every REVOCATION_SYNC_INTERVAL
+    seconds. Everything is reloaded without expired entries every
+    REVOCATION_REBUILD_INTERVAL seconds, or sooner once the filter holds
+    more than it was sized for.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._filter = None
+        self._user_cutoffs = {}
+        self._watermark = None
+        self._built_at = None
+        self._synced_at = None
+
+    @staticmethod
+    def _add_rows(bloom, user_cutoffs, rows, watermark=None):
+        """Add (jti, user_id, revoked_at) rows; returns the latest revoked_at seen"""
+        for jti, user_id, revoked_at in rows:
+            if jti:
+                bloom.add(jti)
+            elif user_id not in user_cutoffs or user_cutoffs[user_id] < revoked_at:
+                user_cutoffs[user_id] = revoked_at
+            if watermark is None or revoked_at > watermark:
+                watermark = revoked_at
+        return watermark
+
+    def _query(self, since=None):
+        """Unexpired revocations recorded after ``since`` (all of them without it)
+
+        revoked_at is set before commit, so a row committed after a newer
+        one was already read would fall behind the watermark; re-reading
+        the last REVOCATION_SYNC_OVERLAP seconds picks it up.
+        """
+        query = db.session.query(RevokedToken.jti, RevokedToken.user_id, RevokedToken.revoked_at).filter(
+            RevokedToken.expires_at > datetime.utcnow()
+        )
+        if since is not None:
+            overlap = timedelta(seconds=current_app.config['REVOCATION_SYNC_OVERLAP'])
+            query = query.filter(RevokedToken.revoked_at > since - overlap)
+        return query
+
+    def rebuild(self):
+        """Load all unexpired revocations, replacing the current state
+
+        The filter is sized for twice the current number of revocations, so
+        it does not fill up again before the next scheduled rebuild.
+        """
+        query = self._query()
+        capacity = max(current_app.config['REVOCATION_BLOOM_CAPACITY'], 2 * query.count())
+        bloom = BloomFilter(capacity)
+        user_cutoffs = {}
+        watermark = self._add_rows(bloom, user_cutoffs, query.yield_per(10000))
+
+        with self._lock:
+            self._filter = bloom
+            self._user_cutoffs = user_cutoffs
+            self._watermark = watermark
+            self._built_at = self._synced_at = time.monotonic()
+
+    def sync(self):
+        """Add revocations recorded since the last build or sync"""
+        rows = self._query(self._watermark).all()
+        with self._lock:
+            self._watermark = self._add_rows(self._filter, self._user_cutoffs, rows, self._watermark)
+            self._synced_at = time.monotonic()
+
+    def refresh_if_stale(self):
+        """Build, sync or rebuild according to the configured intervals"""
+        if not self._refresh_lock.acquire(blocking=self._built_at is None):
+            return
+        try:
+            now = time.monotonic()
+            config = current_app.config
+            if (self._built_at is None
+                    or now - self._built_at >= config['REVOCATION_REBUILD_INTERVAL']
+                    or self._filter.count > self._filter.capacity):
+                self.rebuild()
+            elif now - self._synced_at >= config['REVOCATION_SYNC_INTERVAL']:
+                self.sync()
+        finally:
+            self._refresh_lock.release()
+
+    def add(self, rows):
+        """Add (jti, user_id, revoked_at) rows revoked through this worker"""
+        with self._lock:
+            if self._filter is not None:
+                self._add_rows(self._filter, self._user_cutoffs, rows)
+
+    def might_contain(self, jti):
+        """Check the filter; False means the token is not revoked on its own"""
+        with self._lock:
+            return jti in self._filter
+
+    def user_cutoff(self, user_id):
+        """Latest user-wide revocation time of a user, or None"""
+        with self._lock:
+            return self._user_cutoffs.get(user_id)
+
+
+revocation_list = RevocationList()
+
+
+def is_token_revoked(jwt_payload):
+    """Check whether a decoded access token has been revoked
+
+    iat only has whole-second resolution, so a user-wide revocation covers
+    every token issued up to the end of its second; a token issued earlier
+    in that second must not survive it. A login within the same second has
+    to be repeated.
+    """
+    jti = jwt_payload['jti']
+    user_id = int(jwt_payload['sub'])
+
+    revocation_list.refresh_if_stale()
+    cutoff = revocation_list.user_cutoff(user_id)
+    if cutoff is not None and datetime.utcfromtimestamp(jwt_payload['iat']) <= cutoff.replace(microsecond=0):
+        return True
+    if not revocation_list.might_contain(jti):
+        return False
+
+    return db.session.query(RevokedToken.query.filter(RevokedToken.jti == jti).exists()).scalar()
+
+
+def revoke_token(jwt_payload):
+    """Revoke a single access token"""
+    db.session.add(RevokedToken(
+        jti=jwt_payload['jti'],
+        user_id=int(jwt_payload['sub']),
+        expires_at=datetime.utcfromtimestamp(jwt_payload['exp'])
+    ))
+
+
+def revoke_user_tokens(user_id):
+    """Revoke every access token issued to a user up to now"""
+    now = datetime.utcnow()
+    db.session.add(RevokedToken(
+        user_id=user_id,
+        revoked_at=now,
+        expires_at=now + timedelta(seconds=current_app.config['JWT_ACCESS_TOKEN_EXPIRES'])
+    ))
+
+
+@event.listens_for(db.session, 'after_flush')
+def _collect_revocations(session, flush_context):
+    rows = session.info.setdefault('revocations', [])
+    rows.extend((obj.jti, obj.user_id, obj.revoked_at) for obj in session.new if isinstance(obj, RevokedToken))
+
+
+@event.listens_for(db.session, 'after_commit')
+def _add_revocations(session):
+    rows = session.info.pop('revocations', None)
+    if rows:
+        revocation_list.add(rows)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_revocations(session):
+    session.info.pop('revocations', None)
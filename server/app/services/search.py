@@ -0,0 +1,77 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app, copy_current_request_context
+from sqlalchemy import and_, func
+from app import db
+
+_executor = None
+_executor_lock = threading.Lock()
+
+# Splits a value into its distinct lower-cased character bigrams. Japanese text
+# has no word boundaries, so n-grams are what makes substring search indexable;
+# unlike pg_trgm this does not depend on the database locale and also covers
+# two-character terms such as 鈴木.
+BIGRAM_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION search_bigrams(value text) RETURNS text[]
+LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE AS $$
+    SELECT coalesce(array_agg(DISTINCT substr(lower(value), i, 2)), '{}')
+    FROM generate_series(1, char_length(value) - 1) AS i
+$$
+"""
+
+
+def search_bigrams(expression):
+    """SQL expression returning the bigram array of a column or value"""
+    return func.search_bigrams(expression)
+
+
+def use_ngram_index():
+    """Check whether substring filters can use the bigram GIN indexes"""
+    if current_app.config.get('SEARCH_BACKEND') == 'ilike':
+        return False
+    return db.engine.dialect.name == 'postgresql'
+
+
+def escape_like(term):
+    """Escape LIKE wildcards so the term is matched literally"""
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def contains(column, term):
+    """Build a case-insensitive substring filter for a text column
+
+    On PostgreSQL the bigram index narrows the candidates first and ILIKE
+    rechecks them; elsewhere this is a plain ILIKE scan.
+    """
+    term = str(term)
+    clause = column.ilike(f'%{escape_like(term)}%', escape='\\')
+
+    if len(term) >= 2 and use_ngram_index():
+        clause = and_(search_bigrams(column).op('@>')(search_bigrams(term)), clause)
+
+    return clause
+
+
+def _get_executor(max_workers):
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='search')
+        return _executor
+
+
+def run_concurrently(tasks):
+    """Run independent search tasks and return their results in order
+
+    With SEARCH_MAX_WORKERS above 1 the tasks run on a shared thread pool of
+    that size, so a worker process never holds more than that many extra
+    connections for searches. Each task gets its own app context and thus its
+    own session and pooled connection.
+    """
+    max_workers = current_app.config['SEARCH_MAX_WORKERS']
+    if max_workers <= 1 or len(tasks) <= 1:
+        return [task() for task in tasks]
+    
+    executor = _get_executor(max_workers)
+    futures = [executor.submit(copy_current_request_context(task)) for task in tasks]
+    return [future.result() for future in futures]
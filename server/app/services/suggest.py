@@ -0,0 +1,311 @@
+import heapq
+import threading
+import time
+import unicodedata
+from array import array
+from bisect import bisect_left
+from datetime import timedelta
+from flask import current_app
+from sqlalchemy import event
+from app import db
+from app.models.case import Case
+from app.models.customer import Customer
+from app.models.investigation import Investigation
+from app.models.target import Target
+
+# entity type -> (model, label column)
+SUGGEST_SOURCES = {
+    'cases': (Case, Case.name),
+    'customers': (Customer, Customer.name),
+    'investigations': (Investigation, Investigation.title),
+    'targets': (Target, Target.name),
+}
+_SOURCE_TYPES = {model: entity_type for entity_type, (model, _) in SUGGEST_SOURCES.items()}
+
+
+def normalize(text):
+    """Normalize text for matching (full/half width folding and lower case)"""
+    return unicodedata.normalize('NFKC', text).lower()
+
+
+def _grams(text):
+    """Unigrams and bigrams of normalized text, as ints
+
+    A unigram is its code point and a bigram packs both code points above
+    that range; ints take far less memory than one- and two-character
+    strings as the keys of a large index.
+    """
+    codes = [ord(char) for char in text]
+    grams = set(codes)
+    grams.update((a + 1) << 21 | b for a, b in zip(codes, codes[1:]))
+    return grams
+
+
+def _contains(positions, position):
+    """Whether a sorted array holds a position"""
+    i = bisect_left(positions, position)
+    return i < len(positions) and positions[i] == position
+
+
+def _latest(rows, since):
+    """Latest updated_at of (id, label, updated_at) rows, or ``since`` if none is later"""
+    for _, _, updated_at in rows:
+        if updated_at and (since is None or updated_at > since):
+            since = updated_at
+    return since
+
+
+def _rank(query, normalized, item_id):
+    return (not normalized.startswith(query), len(normalized), normalized, item_id)
+
+
+class _Segment:
+    """N-gram index over the labels of one entity type, loaded once and then read-only
+
+    Entries are numbered by position; ids, labels and postings live in flat
+    arrays and lists rather than per-entry tuples and sets, whose overhead
+    would dominate at a few million names. Postings are sorted position
+    arrays, so intersections are binary searches.
+    """
+
+    def __init__(self):
+        self.ids = array('I')
+        self.labels = []
+        # Normalized label where it differs from the label itself, else None
+        self.folded = []
+        # gram -> sorted array of positions, or a bare position for a gram of one label
+        self.postings = {}
+
+    def load(self, rows):
+        """Add (id, label, updated_at) rows; returns the latest updated_at"""
+        latest = None
+        for item_id, label, updated_at in rows:
+            if updated_at and (latest is None or updated_at > latest):
+                latest = updated_at
+            if not label:
+                continue
+            normalized = normalize(label)
+            position = len(self.ids)
+            self.ids.append(item_id)
+            self.labels.append(label)
+            self.folded.append(None if normalized == label else normalized)
+            for gram in _grams(normalized):
+                positions = self.postings.get(gram)
+                if positions is None:
+                    self.postings[gram] = position
+                elif isinstance(positions, int):
+                    self.postings[gram] = array('I', (positions, position))
+                else:
+                    positions.append(position)
+        return latest
+
+    def normalized(self, position):
+        return self.folded[position] or self.labels[position]
+
+    def matching(self, grams):
+        """Positions of the labels containing all grams"""
+        postings = [self.postings.get(gram) for gram in grams]
+        if None in postings:
+            return []
+        postings = [(positions,) if isinstance(positions, int) else positions for positions in postings]
+        postings.sort(key=len)
+        first, rest = postings[0], postings[1:]
+        return [position for position in first if all(_contains(positions, position) for positions in rest)]
+
+
+class SuggestIndex:
+    """Per-process n-gram index over entity names for search-as-you-type
+
+    Each entity type has a read-only segment loaded by a full build, plus
+    the changes seen since then, which take precedence over it. Writes made
+    through this process are applied on commit. Writes made by other worker
+    processes are picked up by a periodic incremental sync on updated_at,
+    and deletions by a periodic full rebuild in the background, which also
+    folds the changes into fresh segments.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._segments = {}
+        # entity type -> {id: (label, normalized label), or None once deleted}
+        self._changes = {entity_type: {} for entity_type in SUGGEST_SOURCES}
+        # Changes seen while a rebuild runs, which its fresh segments may miss
+        self._pending = None
+        self._watermarks = {}
+        self._built_at = None
+        self._synced_at = None
+
+    def _set(self, key, label):
+        entity_type, item_id = key
+        change = (label, normalize(label)) if label else None
+        self._changes[entity_type][item_id] = change
+        if self._pending is not None:
+            self._pending[entity_type][item_id] = change
+
+    def _query(self, entity_type, since=None):
+        """Rows of one source changed after ``since`` (all rows without it)
+
+        updated_at is set before commit, so a row committed after a newer
+        one was already read would fall behind the watermark; re-reading
+        the last SUGGEST_SYNC_OVERLAP seconds picks it up.
+        """
+        model, column = SUGGEST_SOURCES[entity_type]
+        query = db.session.query(model.id, column, model.updated_at)
+        if since is not None:
+            overlap = timedelta(seconds=current_app.config['SUGGEST_SYNC_OVERLAP'])
+            query = query.filter(model.updated_at > since - overlap)
+        return query
+
+    def rebuild(self):
+        """Load all names from the database, replacing the current index
+
+        The new segments are built aside and swapped in, so suggestions keep
+        being served from the old ones meanwhile. Changes seen during the
+        build are kept on top of them.
+        """
+        with self._lock:
+            self._pending = {entity_type: {} for entity_type in SUGGEST_SOURCES}
+        segments = {}
+        watermarks = {}
+        try:
+            for entity_type in SUGGEST_SOURCES:
+                segments[entity_type] = segment = _Segment()
+                watermarks[entity_type] = segment.load(self._query(entity_type).yield_per(10000))
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
+        with self._lock:
+            self._segments = segments
+            self._changes, self._pending = self._pending, None
+            self._watermarks = watermarks
+            self._built_at = self._synced_at = time.monotonic()
+
+    def sync(self):
+        """Pick up rows changed since the last build or sync
+
+        The rows are read before taking the lock, so searches are not held
+        up by the queries.
+        """
+        changes = {}
+        watermarks = {}
+        for entity_type in SUGGEST_SOURCES:
+            since = self._watermarks.get(entity_type)
+            rows = self._query(entity_type, since).all()
+            watermarks[entity_type] = _latest(rows, since)
+            changes.update(((entity_type, item_id), label) for item_id, label, _ in rows)
+        with self._lock:
+            for key, label in changes.items():
+                self._set(key, label)
+            self._watermarks.update(watermarks)
+            self._synced_at = time.monotonic()
+
+    def _rebuild_in_background(self, app):
+        try:
+            with app.app_context():
+                self.rebuild()
+        except Exception:
+            app.logger.exception('Suggest index rebuild failed')
+        finally:
+            self._refresh_lock.release()
+
+    def refresh_if_stale(self):
+        """Build, sync or rebuild according to the configured intervals
+
+        Only the first build makes callers wait. Later rebuilds run on a
+        background thread while the current index keeps serving; refreshes
+        are skipped while another thread is already running one.
+        """
+        if not self._refresh_lock.acquire(blocking=self._built_at is None):
+            return
+        in_background = False
+        try:
+            now = time.monotonic()
+            config = current_app.config
+            if self._built_at is None:
+                self.rebuild()
+            elif now - self._built_at >= config['SUGGEST_REBUILD_INTERVAL']:
+                threading.Thread(
+                    target=self._rebuild_in_background, args=(current_app._get_current_object(),),
+                    name='suggest-rebuild', daemon=True
+                ).start()
+                in_background = True
+            elif now - self._synced_at >= config['SUGGEST_SYNC_INTERVAL']:
+                self.sync()
+        finally:
+            if not in_background:
+                self._refresh_lock.release()
+
+    def apply(self, changes):
+        """Apply committed changes, a mapping of (entity_type, id) -> label or None"""
+        with self._lock:
+            if self._built_at is None:
+                return
+            for key, label in changes.items():
+                self._set(key, label)
+
+    def search(self, query, limit):
+        """Get up to ``limit`` suggestions per entity type for a query"""
+        results = {entity_type: [] for entity_type in SUGGEST_SOURCES}
+        query = normalize(query.strip())
+        if not query:
+            return results
+
+        grams = _grams(query)
+        with self._lock:
+            for entity_type, changes in self._changes.items():
+                entries = []
+                segment = self._segments.get(entity_type)
+                if segment is not None:
+                    for position in segment.matching(grams):
+                        item_id = segment.ids[position]
+                        normalized = segment.normalized(position)
+                        if item_id not in changes and query in normalized:
+                            entries.append((_rank(query, normalized, item_id), item_id, segment.labels[position]))
+                for item_id, change in changes.items():
+                    if change is not None and query in change[1]:
+                        entries.append((_rank(query, change[1], item_id), item_id, change[0]))
+                results[entity_type] = [
+                    {'id': item_id, 'label': label}
+                    for _, item_id, label in heapq.nsmallest(limit, entries)
+                ]
+        return results
+
+
+suggest_index = SuggestIndex()
+
+
+def record_changes(session, changes):
+    """Queue index changes, a mapping of (entity_type, id) -> label or None, for the next commit
+
+    Writes that bypass the unit of work (bulk inserts) use this to reach the
+    index without waiting for the next sync.
+    """
+    session.info.setdefault('suggest_changes', {}).update(changes)
+
+
+@event.listens_for(db.session, 'after_flush')
+def _collect_changes(session, flush_context):
+    changes = session.info.setdefault('suggest_changes', {})
+    for obj in session.new | session.dirty:
+        entity_type = _SOURCE_TYPES.get(type(obj))
+        if entity_type:
+            label_column = SUGGEST_SOURCES[entity_type][1]
+            changes[(entity_type, obj.id)] = getattr(obj, label_column.key)
+    for obj in session.deleted:
+        entity_type = _SOURCE_TYPES.get(type(obj))
+        if entity_type:
+            changes[(entity_type, obj.id)] = None
+
+
+@event.listens_for(db.session, 'after_commit')
+def _apply_changes(session):
+    changes = session.info.pop('suggest_changes', None)
+    if changes:
+        suggest_index.apply(changes)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_changes(session):
+    session.info.pop('suggest_changes', None)
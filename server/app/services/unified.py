@@ -0,0 +1,83 @@
+from sqlalchemy import and_, case, func, literal, or_, select, union_all
+from app import db
+from app.models.case import Case
+from app.models.customer import Customer
+from app.models.investigation import Investigation
+from app.models.target import Target
+from app.services.search import contains, escape_like
+from app.utils.pagination import InvalidCursorError, decode_payload, encode_payload
+
+SNIPPET_LENGTH = 200
+
+# entity type -> (model, title column, snippet column, searched columns)
+UNIFIED_ENTITIES = {
+    'cases': (Case, Case.name, Case.description, [Case.name, Case.description]),
+    'customers': (Customer, Customer.name, Customer.address,
+                  [Customer.name, Customer.email, Customer.phone, Customer.address]),
+    'investigations': (Investigation, Investigation.title, Investigation.description,
+                       [Investigation.title, Investigation.description]),
+    'targets': (Target, Target.name, Target.details, [Target.name, Target.type, Target.details]),
+}
+
+
+def _entity_select(entity_type, term):
+    model, title, snippet, columns = UNIFIED_ENTITIES[entity_type]
+    escaped = escape_like(term)
+
+    # A title starting with the term ranks above a title containing it, which
+    # ranks above a match in any other column.
+    score = case(
+        (title.ilike(f'{escaped}%', escape='\\'), 3),
+        (title.ilike(f'%{escaped}%', escape='\\'), 2),
+        else_=1
+    )
+
+    return select(
+        literal(entity_type).label('entity_type'),
+        model.id.label('id'),
+        title.label('title'),
+        func.substr(snippet, 1, SNIPPET_LENGTH).label('snippet'),
+        score.label('score')
+    ).where(or_(*[contains(column, term) for column in columns]))
+
+
+def _decode_position(cursor):
+    payload = decode_payload(cursor)
+    try:
+        return int(payload['s']), str(payload['e']), int(payload['i'])
+    except (ValueError, TypeError, KeyError) as e:
+        raise InvalidCursorError('カーソルが無効です。') from e
+
+
+def unified_search(term, entities, limit, cursor=None):
+    """Search all entity types at once and rank the hits together
+
+    Runs a single UNION ALL query ordered by (score desc, entity_type, id) and
+    pages through it with a keyset cursor. Returns the hits and the cursor for
+    the next page, if any.
+    """
+    selects = [_entity_select(entity_type, term) for entity_type in UNIFIED_ENTITIES if entity_type in entities]
+    if not selects:
+        return [], None
+
+    hits = union_all(*selects).subquery('hits')
+    stmt = select(hits)
+
+    if cursor:
+        score, entity_type, item_id = _decode_position(cursor)
+        stmt = stmt.where(or_(
+            hits.c.score < score,
+            and_(hits.c.score == score, hits.c.entity_type > entity_type),
+            and_(hits.c.score == score, hits.c.entity_type == entity_type, hits.c.id > item_id)
+        ))
+
+    stmt = stmt.order_by(hits.c.score.desc(), hits.c.entity_type, hits.c.id).limit(limit + 1)
+    rows = [dict(row._mapping) for row in db.session.execute(stmt)]
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_payload({'s': last['score'], 'e': last['entity_type'], 'i': last['id']})
+
+    return rows, next_cursor
@@ -0,0 +1,78 @@
+from datetime import datetime
+from itertools import chain
+from sqlalchemy import event, select
+from sqlalchemy.dialects import postgresql, sqlite
+from app import db
+from app.models.table_version import TableVersion
+
+# Tables whose writes are counted; the API resources are served from these
+VERSIONED_TABLES = ('cases', 'customers', 'investigations', 'targets')
+
+_versions = TableVersion.__table__
+
+# INSERT ... ON CONFLICT for the supported databases
+_UPSERTS = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+
+
+def bump_versions(connection, table_names):
+    """Increment the versions of tables, with one upsert per table
+
+    Rows are written in a fixed order so concurrent writers cannot deadlock
+    on them; a missing row (databases made with create_all) is inserted by
+    the same statement.
+    """
+    upsert = _UPSERTS[connection.dialect.name]
+    now = datetime.utcnow()
+    for table_name in sorted(set(table_names) & set(VERSIONED_TABLES)):
+        connection.execute(
+            upsert(_versions)
+            .values(table_name=table_name, version=1, updated_at=now)
+            .on_conflict_do_update(
+                index_elements=[_versions.c.table_name],
+                set_={'version': _versions.c.version + 1, 'updated_at': now}
+            )
+        )
+
+
+def record_writes(session, table_names):
+    """Queue version bumps for tables written in the session's transaction
+
+    Writes that bypass the unit of work (bulk inserts) use this. The bumps
+    run when the transaction commits, so the version rows are only locked
+    for the commit itself and updated_at is the commit time.
+    """
+    session.info.setdefault('written_tables', set()).update(table_names)
+
+
+def get_versions(table_names):
+    """Get {table name: (version, updated_at)} for tables, with one query"""
+    rows = db.session.execute(
+        select(_versions.c.table_name, _versions.c.version, _versions.c.updated_at)
+        .where(_versions.c.table_name.in_(table_names))
+    )
+    versions = {table_name: (0, None) for table_name in table_names}
+    for table_name, version, updated_at in rows:
+        versions[table_name] = (version, updated_at)
+    return versions
+
+
+@event.listens_for(db.session, 'after_flush')
+def _collect_flushed_tables(session, flush_context):
+    modified = [obj for obj in session.dirty if session.is_modified(obj)]
+    tables = {obj.__table__.name for obj in chain(session.new, session.deleted, modified)}
+    if tables & set(VERSIONED_TABLES):
+        record_writes(session, tables)
+
+
+@event.listens_for(db.session, 'before_commit')
+def _bump_written_tables(session):
+    # Flush first so writes still pending are counted
+    session.flush()
+    tables = session.info.pop('written_tables', None)
+    if tables:
+        bump_versions(session.connection(), tables)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_written_tables(session):
+    session.info.pop('written_tables', None)
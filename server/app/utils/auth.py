@@ -1,7 +1,30 @@
 from functools import wraps
 from flask import jsonify
-from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
-from app.models.user import User
+from flask_jwt_extended import get_jwt, get_jwt_identity, verify_jwt_in_request
+from app.utils.user_cache import user_cache
+
+
+def token_claims(user):
+    """Additional JWT claims carrying the user's role and role version"""
+    return {'role': user.role, 'rv': user.role_version}
+
+
+def current_user_is_admin():
+    """Check the admin role of the current token without a database query
+
+    The role comes from the token claims. The role version is checked
+    against the cached user, so a token issued before a role change stops
+    working once the cache entry is refreshed.
+    """
+    claims = get_jwt()
+    if claims.get('role', 'admin') != 'admin':
+        return False
+    
+    user = user_cache.get(get_jwt_identity())
+    if not user or user['role'] != 'admin':
+        return False
+    return 'rv' not in claims or claims['rv'] == user['role_version']
+
 
 def admin_required():
     """Decorator to check if the current user is an admin"""
@@ -9,10 +32,8 @@ def admin_required():
         @wraps(fn)
         def decorator(*args, **kwargs):
             verify_jwt_in_request()
-            user_id = get_jwt_identity()
-            user = User.query.get(user_id)
             
-            if not user or not user.is_admin():
+            if not current_user_is_admin():
                 return jsonify({
                     'message': '管理者権限が必要です。',
                     'status': 'error'
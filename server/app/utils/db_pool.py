@@ -0,0 +1,120 @@
+import bisect
+import os
+import threading
+import time
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+
+# Upper bounds (ms) of the checkout wait histogram buckets; the last bucket is open
+WAIT_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+
+class PoolStats:
+    """Checkout wait times of this worker's connection pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.total_wait = 0.0
+            self.max_wait = 0.0
+            self.buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+
+    def record(self, wait, timed_out=False):
+        wait_ms = wait * 1000
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.total_wait += wait_ms
+            self.max_wait = max(self.max_wait, wait_ms)
+            self.buckets[bisect.bisect_left(WAIT_BUCKETS_MS, wait_ms)] += 1
+
+    def to_dict(self):
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            return {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'avg_wait_ms': round(self.total_wait / attempts, 3) if attempts else 0.0,
+                'max_wait_ms': round(self.max_wait, 3),
+                # le_ms is the bucket's upper bound, None for the open last bucket
+                'histogram': [
+                    {'le_ms': bound, 'count': count}
+                    for bound, count in zip(WAIT_BUCKETS_MS + (None,), self.buckets)
+                ],
+            }
+
+
+pool_stats = PoolStats()
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool recording how long each checkout waits for a connection"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            pool_stats.record(time.perf_counter() - started, timed_out=True)
+            raise
+        pool_stats.record(time.perf_counter() - started)
+        return connection
+
+
+def engine_options(database_url, config):
+    """SQLALCHEMY_ENGINE_OPTIONS for the configured pool settings
+
+    SQLite keeps the pool Flask-SQLAlchemy chooses for it; only pre-ping and
+    recycle apply there.
+    """
+    options = {
+        'pool_pre_ping': config['DB_POOL_PRE_PING'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+    }
+    if not database_url or database_url.startswith('sqlite'):
+        return options
+
+    options.update({
+        'poolclass': TimedQueuePool,
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+    })
+    if config['DB_STATEMENT_TIMEOUT'] and database_url.startswith('postgresql'):
+        options['connect_args'] = {'options': f"-c statement_timeout={config['DB_STATEMENT_TIMEOUT']}"}
+    return options
+
+
+def warm_pool(engine, size):
+    """Open up to ``size`` pooled connections now rather than on first use"""
+    connections = []
+    try:
+        for _ in range(size):
+            connections.append(engine.connect())
+    finally:
+        for connection in connections:
+            connection.close()
+
+
+def pool_status(engine):
+    """Live state of an engine's pool plus this worker's checkout wait statistics"""
+    pool = engine.pool
+    status = {'pid': os.getpid(), 'pool_class': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            'size': pool.size(),
+            'checked_out': pool.checkedout(),
+            'checked_in': pool.checkedin(),
+            'overflow': max(pool.overflow(), 0),
+            'max_overflow': pool._max_overflow,
+            'timeout': pool.timeout(),
+        })
+    status['waits'] = pool_stats.to_dict()
+    return status
@@ -0,0 +1,69 @@
+from datetime import date, datetime
+from flask import has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - falls back to the json module
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - MessagePack is then never negotiated
+    msgpack = None
+
+JSON_MIMETYPE = 'application/json'
+MSGPACK_MIMETYPES = ('application/msgpack', 'application/x-msgpack')
+
+
+def negotiated_mimetype():
+    """Response mimetype preferred by the request's Accept header"""
+    if msgpack is None or not has_request_context():
+        return JSON_MIMETYPE
+    return request.accept_mimetypes.best_match((JSON_MIMETYPE,) + MSGPACK_MIMETYPES, default=JSON_MIMETYPE)
+
+
+def _msgpack_default(obj):
+    if isinstance(obj, (date, datetime)):
+        return obj.isoformat()
+    return DefaultJSONProvider.default(obj)
+
+
+class ResponseEncoder(DefaultJSONProvider):
+    """JSON provider encoding with orjson, or MessagePack when the client asks for it
+
+    Installed as ``app.json``, so every ``jsonify`` response goes through it.
+    """
+
+    def _orjson_options(self):
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps(self, obj, **kwargs):
+        sort_keys = kwargs.pop('sort_keys', self.sort_keys)
+        if orjson is None or kwargs:
+            return super().dumps(obj, sort_keys=sort_keys, **kwargs)
+        options = orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=self.default, option=options).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        mimetype = negotiated_mimetype()
+        if mimetype != JSON_MIMETYPE:
+            body = msgpack.packb(obj, default=_msgpack_default, datetime=False)
+            return self._app.response_class(body, mimetype=mimetype)
+        if orjson is None:
+            return super().response(obj)
+        body = orjson.dumps(obj, default=self.default, option=self._orjson_options())
+        return self._app.response_class(body, mimetype=self.mimetype)
@@ -0,0 +1,91 @@
+import hashlib
+from datetime import datetime
+from functools import wraps
+from flask import current_app, request
+from app.services.response_cache import response_cache
+from app.services.versions import get_versions
+from app.utils.encoding import negotiated_mimetype
+
+
+def _versioned_key(table_names, *parts):
+    """Key of the current request over the tables' change versions, with their latest change time"""
+    versions = get_versions(table_names)
+    tag = ':'.join(f'{name}={versions[name][0]}' for name in table_names)
+    digest = hashlib.sha1(f'{request.method} {request.full_path}|{negotiated_mimetype()}|{tag}'.encode('utf-8'))
+    for part in parts:
+        digest.update(b'|' + part)
+    timestamps = [updated_at for _, updated_at in versions.values() if updated_at]
+    return digest.hexdigest(), max(timestamps).replace(microsecond=0) if timestamps else None
+
+
+def _render_cached(key, fn, args, kwargs):
+    """Run a view through the response cache; only 200 responses are stored"""
+    uncached = []
+
+    def compute():
+        response = current_app.make_response(fn(*args, **kwargs))
+        if response.status_code != 200:
+            uncached.append(response)
+            return None
+        return response.mimetype.encode('utf-8') + b'\n' + response.get_data()
+
+    value = response_cache.get_or_compute(key, compute)
+    if value is None:
+        # The view ran for this request and its response is not cacheable
+        return uncached[0]
+    mimetype, body = value.split(b'\n', 1)
+    return current_app.response_class(body, mimetype=mimetype.decode('utf-8'))
+
+
+def conditional(*table_names):
+    """Decorator adding ETag/Last-Modified and response caching to a GET view
+
+    The validators come from the change versions of the tables the view is
+    served from, so a matching If-None-Match or If-Modified-Since is answered
+    with 304 after one small query, before the view runs its own queries or
+    serialization. Other requests are served from the response cache under
+    the same versioned key.
+    """
+    def wrapper(fn):
+        @wraps(fn)
+        def decorator(*args, **kwargs):
+            etag, last_modified = _versioned_key(table_names)
+
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains(etag)
+            else:
+                since = request.if_modified_since
+                # Last-Modified has whole seconds, so a change later in the current
+                # second would carry the same value; only settled seconds can match
+                not_modified = bool(since and last_modified and last_modified <= since.replace(tzinfo=None)
+                                    and last_modified < datetime.utcnow().replace(microsecond=0))
+
+            if not_modified:
+                response = current_app.response_class(status=304)
+            else:
+                response = _render_cached(etag, fn, args, kwargs)
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            if last_modified:
+                response.last_modified = last_modified
+            response.headers['Cache-Control'] = 'private, no-cache'
+            response.vary.add('Accept')
+            return response
+        return decorator
+    return wrapper
+
+
+def cached(*table_names):
+    """Decorator caching a view's response by path, body and table change versions
+
+    For views that are not plain GETs, e.g. search requests with a JSON body.
+    """
+    def wrapper(fn):
+        @wraps(fn)
+        def decorator(*args, **kwargs):
+            key, _ = _versioned_key(table_names, request.get_data())
+            return _render_cached(key, fn, args, kwargs)
+        return decorator
+    return wrapper
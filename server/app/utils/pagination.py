@@ -0,0 +1,180 @@
+import base64
+import json
+import math
+from datetime import datetime
+from flask import request
+from sqlalchemy import tuple_
+from app import db
+
+DEFAULT_PER_PAGE = 10
+COUNT_STRATEGIES = ('exact', 'estimated', 'none')
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+
+class InvalidCountError(ValueError):
+    """Raised when ?count= names an unknown total-count strategy"""
+
+
+def encode_payload(payload):
+    """Encode a JSON-serializable cursor payload as an opaque string"""
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_payload(cursor):
+    """Decode a cursor string produced by ``encode_payload``"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        return json.loads(raw)
+    except ValueError as e:
+        raise InvalidCursorError('カーソルが無効です。') from e
+
+
+def encode_cursor(item, direction):
+    """Build an opaque cursor pointing at the (created_at, id) key of an item"""
+    return encode_payload({'d': direction, 'k': [item.created_at.isoformat(), item.id]})
+
+
+def decode_cursor(cursor):
+    """Decode a cursor into (direction, created_at, id)"""
+    payload = decode_payload(cursor)
+    try:
+        created_at, item_id = payload['k']
+        direction = payload['d']
+        if direction not in ('next', 'prev'):
+            raise ValueError(direction)
+        return direction, datetime.fromisoformat(created_at), int(item_id)
+    except (ValueError, TypeError, KeyError) as e:
+        raise InvalidCursorError('カーソルが無効です。') from e
+
+
+def is_cursor_request():
+    """Check whether the request asks for cursor (keyset) pagination"""
+    return 'cursor' in request.args or 'limit' in request.args
+
+
+def get_count_strategy():
+    """Get the total-count strategy requested via ?count=exact|estimated|none"""
+    strategy = request.args.get('count', 'exact')
+    if strategy not in COUNT_STRATEGIES:
+        raise InvalidCountError('countはexact、estimated、noneのいずれかを指定してください。')
+    return strategy
+
+
+def estimate_count(query):
+    """Estimate the number of rows a query returns from planner statistics
+
+    Databases other than PostgreSQL fall back to an exact count.
+    """
+    query = query.order_by(None)
+    if db.engine.dialect.name != 'postgresql':
+        return query.count()
+    
+    compiled = query.statement.compile(dialect=db.engine.dialect)
+    params = compiled.params
+    if compiled.positional:
+        # e.g. $1 placeholders: the driver takes the values in placeholder order
+        params = tuple(params[name] for name in compiled.positiontup)
+    plan = db.session.connection().exec_driver_sql(
+        'EXPLAIN (FORMAT JSON) ' + str(compiled), params
+    ).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def paginate(query, model):
+    """Paginate a query from the request args
+
+    ``page``/``per_page`` keeps the offset based contract, while
+    ``cursor``/``limit`` switches to keyset pagination on (created_at, id).
+    Returns the page items and the ``pagination`` response section.
+    """
+    if is_cursor_request():
+        return _paginate_cursor(query, model)
+    return paginate_offset(query, model)
+
+
+def paginate_offset(query, model):
+    """Paginate a query with page/per_page, honouring the ?count strategy"""
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', DEFAULT_PER_PAGE, type=int)
+    strategy = get_count_strategy()
+
+    if not page or page < 1:
+        page = 1
+    if not per_page or per_page < 1:
+        per_page = DEFAULT_PER_PAGE
+
+    query = query.order_by(model.created_at, model.id)
+
+    if strategy == 'exact':
+        pagination = query.paginate(page=page, per_page=per_page)
+        return pagination.items, {
+            'total': pagination.total,
+            'pages': pagination.pages,
+            'page': page,
+            'per_page': per_page,
+            'has_next': pagination.has_next,
+            'has_prev': pagination.has_prev,
+            'count': strategy
+        }
+
+    # Fetch one extra row to find out whether a next page exists without counting
+    rows = query.limit(per_page + 1).offset((page - 1) * per_page).all()
+    items = rows[:per_page]
+    data = {
+        'page': page,
+        'per_page': per_page,
+        'has_next': len(rows) > per_page,
+        'has_prev': page > 1,
+        'count': strategy
+    }
+
+    if strategy == 'estimated':
+        seen = (page - 1) * per_page + len(rows)
+        total = max(estimate_count(query), seen) if data['has_next'] else seen
+        data['total'] = total
+        data['pages'] = math.ceil(total / per_page)
+
+    return items, data
+
+
+def _paginate_cursor(query, model):
+    limit = request.args.get('limit', DEFAULT_PER_PAGE, type=int)
+    cursor = request.args.get('cursor')
+
+    if not limit or limit < 1:
+        limit = DEFAULT_PER_PAGE
+
+    key = tuple_(model.created_at, model.id)
+    direction = 'next'
+    if cursor:
+        direction, created_at, item_id = decode_cursor(cursor)
+        bound = tuple_(created_at, item_id)
+
+    if direction == 'prev':
+        rows = query.filter(key < bound).order_by(
+            model.created_at.desc(), model.id.desc()
+        ).limit(limit + 1).all()
+        items = list(reversed(rows[:limit]))
+        has_next = True
+        has_prev = len(rows) > limit
+    else:
+        if cursor:
+            query = query.filter(key > bound)
+        rows = query.order_by(model.created_at, model.id).limit(limit + 1).all()
+        items = rows[:limit]
+        has_next = len(rows) > limit
+        has_prev = bool(cursor)
+
+    return items, {
+        'limit': limit,
+        'next_cursor': encode_cursor(items[-1], 'next') if items and has_next else None,
+        'prev_cursor': encode_cursor(items[0], 'prev') if items and has_prev else None,
+        'has_next': has_next,
+        'has_prev': has_prev
+    }
@@ -0,0 +1,116 @@
+from datetime import date
+from flask import request
+from sqlalchemy.orm import load_only
+
+# Computed fields of to_dict(), per table
+COUNT_FIELDS = {
+    'cases': ('customer_count', 'investigation_count'),
+    'investigations': ('target_count',),
+}
+
+
+class InvalidFieldsError(ValueError):
+    """Raised when ?fields= names a field the resource does not have"""
+
+
+def parse_include():
+    """Get the optional response sections requested via ?include=a,b"""
+    raw = request.args.get('include', '')
+    return {part.strip() for part in raw.split(',') if part.strip()}
+
+
+def field_names(model):
+    """Fields of a model's to_dict(): its columns plus computed counts"""
+    return [column.key for column in model.__table__.columns] + list(COUNT_FIELDS.get(model.__tablename__, ()))
+
+
+def parse_fields(model, strict=True):
+    """Get the sparse fieldset requested via ?fields=a,b or ?fields[<table>]=a,b
+
+    Returns None when no fieldset is requested; ``id`` is always included.
+    Unknown names raise InvalidFieldsError, or are dropped unless ``strict``.
+    """
+    raw = request.args.get(f'fields[{model.__tablename__}]') or request.args.get('fields')
+    if not raw:
+        return None
+    
+    names = [part.strip() for part in raw.split(',') if part.strip()]
+    known = field_names(model)
+    unknown = [name for name in names if name not in known]
+    if unknown and strict:
+        raise InvalidFieldsError(f'不明なフィールドです: {", ".join(unknown)}')
+    return ['id'] + [name for name in known if name in names and name != 'id']
+
+
+def reject_fields():
+    """Raise InvalidFieldsError if ?fields= is given to an endpoint without sparse fieldsets"""
+    if any(name == 'fields' or name.startswith('fields[') for name in request.args):
+        raise InvalidFieldsError('このエンドポイントではfieldsを指定できません。')
+
+
+def with_fields(query, model, fields):
+    """Load only the columns of a fieldset (plus what pagination needs)"""
+    if fields is None:
+        return query
+    columns = model.__table__.columns
+    names = {'id', 'created_at'} | {name for name in fields if name in columns}
+    return query.options(load_only(*[getattr(model, name) for name in names]))
+
+
+def _partial_dict(item, fields, counts):
+    data = {}
+    for name in fields:
+        if name in counts:
+            data[name] = counts[name]
+        elif name not in COUNT_FIELDS.get(item.__tablename__, ()):
+            value = getattr(item, name)
+            data[name] = value.isoformat() if isinstance(value, date) else value
+    return data
+
+
+def serialize_item(item, fields=None):
+    """Convert one model object to a dictionary, limited to a fieldset if given"""
+    if fields is None:
+        return item.to_dict()
+    return serialize_items([item], fields=fields, shape=False)[0]
+
+
+def to_columnar(rows):
+    """Convert a list of dictionaries to a mapping of column name -> list of values"""
+    columns = {}
+    for row in rows:
+        for key in row:
+            if key not in columns:
+                columns[key] = []
+    for key, values in columns.items():
+        values.extend(row.get(key) for row in rows)
+    return columns
+
+
+def serialize_items(items, include_counts=False, fields=None, shape=True):
+    """Convert a page of model objects to dictionaries
+
+    Child counts are only added when ``include_counts`` is set, and are then
+    fetched for the whole page at once instead of per row. With a fieldset
+    (see ``parse_fields``) only those fields are read and returned, counts
+    included when named. With ``?format=columnar`` the page is returned as
+    column name -> values.
+    """
+    model = type(items[0]) if items else None
+    if not items:
+        data = []
+    elif fields is not None:
+        counted = hasattr(model, 'child_counts') and any(name in COUNT_FIELDS[model.__tablename__] for name in fields)
+        counts = model.child_counts([item.id for item in items]) if counted else {}
+        data = [_partial_dict(item, fields, counts.get(item.id, {})) for item in items]
+    elif not hasattr(model, 'child_counts'):
+        data = [item.to_dict() for item in items]
+    elif not include_counts:
+        data = [item.to_dict(include_counts=False) for item in items]
+    else:
+        counts = model.child_counts([item.id for item in items])
+        data = [item.to_dict(counts=counts.get(item.id, {})) for item in items]
+    
+    if shape and request.args.get('format') == 'columnar':
+        return to_columnar(data)
+    return data
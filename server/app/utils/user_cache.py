@@ -0,0 +1,78 @@
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+from sqlalchemy import event
+from app import db
+from app.models.user import User
+
+
+class UserCache:
+    """Small per-worker TTL/LRU cache of user rows
+
+    Entries are plain dictionaries (``User.to_dict()`` plus ``role_version``)
+    so they can be shared between requests. Users changed or deleted through
+    this process are evicted on commit; changes made by other workers are
+    picked up once the TTL expires.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, user_id):
+        """Get the cached user dictionary, loading it from the database on a miss"""
+        try:
+            user_id = int(user_id)
+        except (TypeError, ValueError):
+            return None
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry and entry[0] > now:
+                self._entries.move_to_end(user_id)
+                return entry[1]
+
+        user = db.session.get(User, user_id)
+        if not user:
+            return None
+
+        data = user.to_dict()
+        data['role_version'] = user.role_version
+        with self._lock:
+            self._entries[user_id] = (now + current_app.config['USER_CACHE_TTL'], data)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > current_app.config['USER_CACHE_SIZE']:
+                self._entries.popitem(last=False)
+        return data
+
+    def invalidate(self, user_id):
+        """Drop a user from the cache"""
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        """Drop all cached users"""
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache()
+
+
+@event.listens_for(db.session, 'after_flush')
+def _collect_changed_users(session, flush_context):
+    changed = session.info.setdefault('changed_users', set())
+    changed.update(obj.id for obj in session.dirty | session.deleted if isinstance(obj, User))
+
+
+@event.listens_for(db.session, 'after_commit')
+def _evict_changed_users(session):
+    for user_id in session.info.pop('changed_users', ()):
+        user_cache.invalidate(user_id)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_changed_users(session):
+    session.info.pop('changed_users', None)
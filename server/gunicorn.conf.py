@@ -0,0 +1,28 @@
+# gunicorn -c gunicorn.conf.py wsgi:app
+#
+# The app is loaded once in the parent, which makes no database connections,
+# and workers fork from it. Workers are set with WEB_CONCURRENCY; the schema
+# is applied beforehand with `flask db upgrade`.
+import os
+
+bind = '0.0.0.0:5000'
+preload_app = True
+
+# Requests run on threads, so one waiting on the database holds a thread
+# rather than a worker process. A worker gets one thread per connection its
+# pool can hand out: more would only queue on pool checkout and fail after
+# DB_POOL_TIMEOUT, while gunicorn keeps the excess connections waiting instead.
+worker_class = 'gthread'
+threads = int(os.environ.get('DB_POOL_SIZE', 5)) + int(os.environ.get('DB_MAX_OVERFLOW', 10))
+
+
+def post_worker_init(worker):
+    """Start loading the indexes and opening the pool once the worker is up
+
+    This runs in the background, so a long build cannot hold the worker past
+    its timeout. The parent stays free of them: it would keep its copy for
+    its whole life.
+    """
+    from app.services.readiness import warm_up_in_background
+
+    warm_up_in_background(worker.wsgi)
@@ -0,0 +1,42 @@
+"""
+Script to import customers or targets from a CSV/JSONL file
+"""
+import argparse
+import json
+import sys
+from app import create_app
+from app.services.importer import IMPORT_ENTITIES, IMPORT_FORMATS, ImportFormatError, detect_format, import_rows
+
+def main():
+    """Import a file given on the command line"""
+    parser = argparse.ArgumentParser(description='Import customers or targets from a CSV/JSONL file')
+    parser.add_argument('entity', choices=IMPORT_ENTITIES)
+    parser.add_argument('path')
+    parser.add_argument('--format', choices=IMPORT_FORMATS, help='defaults to the file extension')
+    parser.add_argument('--parent-id', type=int, help='case_id / investigation_id for rows without one')
+    parser.add_argument('--chunk-size', type=int, help='rows per commit (default: IMPORT_CHUNK_SIZE)')
+    args = parser.parse_args()
+    
+    fmt = args.format or detect_format(args.path)
+    if not fmt:
+        parser.error('could not detect the file format, use --format')
+    
+    app = create_app()
+    
+    with app.app_context(), open(args.path, 'rb') as stream:
+        try:
+            result = import_rows(
+                stream, args.entity, fmt,
+                parent_id=args.parent_id,
+                chunk_size=args.chunk_size,
+                progress=lambda imported, failed: print(f"imported {imported}, failed {failed}", flush=True)
+            )
+        except ImportFormatError as e:
+            sys.exit(f"{e} ({e.imported} imported, {e.failed} failed, up to line {e.line})")
+    
+    for error in result['errors']:
+        print(json.dumps(error, ensure_ascii=False))
+    print(f"Done: {result['imported']} imported, {result['failed']} failed.")
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 """
 Script to initialize the database with sample data
 """
+from flask_migrate import upgrade
 from app import create_app, db
 from app.models.user import User
 from app.models.case import Case
@@ -15,7 +16,7 @@ def init_db():
     app = create_app()
     
     with app.app_context():
-        db.create_all()
+        upgrade()
         
         if User.query.count() > 0:
             print("Database already contains data. Skipping initialization.")
@@ -0,0 +1,60 @@
+"""search bigram indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-16 23:05:12.318904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+SEARCH_COLUMNS = {
+    'cases': ['name', 'description'],
+    'customers': ['name', 'email', 'phone', 'address'],
+    'investigations': ['title', 'description'],
+    'targets': ['name', 'type', 'details'],
+}
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION search_bigrams(value text) RETURNS text[]
+        LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE AS $$
+            SELECT coalesce(array_agg(DISTINCT substr(lower(value), i, 2)), '{}')
+            FROM generate_series(1, char_length(value) - 1) AS i
+        $$
+    """)
+
+    # CONCURRENTLY builds without blocking writes, but cannot run in a transaction
+    with op.get_context().autocommit_block():
+        for table, columns in SEARCH_COLUMNS.items():
+            for column in columns:
+                op.create_index(
+                    f'ix_{table}_{column}_bigrams',
+                    table,
+                    [sa.text(f'search_bigrams({column})')],
+                    postgresql_using='gin',
+                    postgresql_concurrently=True
+                )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    with op.get_context().autocommit_block():
+        for table, columns in SEARCH_COLUMNS.items():
+            for column in columns:
+                op.drop_index(f'ix_{table}_{column}_bigrams', table_name=table, postgresql_concurrently=True)
+
+    op.execute('DROP FUNCTION IF EXISTS search_bigrams(text)')
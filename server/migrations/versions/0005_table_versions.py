@@ -0,0 +1,35 @@
+"""table versions
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 02:14:37.905116
+
+"""
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    table_versions = op.create_table('table_versions',
+    sa.Column('table_name', sa.String(length=64), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('table_name')
+    )
+    now = datetime.utcnow()
+    op.bulk_insert(table_versions, [
+        {'table_name': table_name, 'version': 1, 'updated_at': now}
+        for table_name in ('cases', 'customers', 'investigations', 'targets')
+    ])
+
+
+def downgrade():
+    op.drop_table('table_versions')
@@ -0,0 +1,68 @@
+"""foreign key status and timestamp indexes
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-16 23:15:00.488724
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # CONCURRENTLY builds without blocking writes, but cannot run in a transaction
+    with op.get_context().autocommit_block():
+        with op.batch_alter_table('cases', schema=None) as batch_op:
+            batch_op.create_index('ix_cases_created_at_id', ['created_at', 'id'], unique=False, postgresql_concurrently=True)
+            batch_op.create_index('ix_cases_status_created_at_id', ['status', 'created_at', 'id'], unique=False, postgresql_concurrently=True)
+            batch_op.create_index('ix_cases_updated_at', ['updated_at'], unique=False, postgresql_concurrently=True)
+
+        with op.batch_alter_table('customers', schema=None) as batch_op:
+            batch_op.create_index('ix_customers_case_id_created_at_id', ['case_id', 'created_at', 'id'], unique=False, postgresql_concurrently=True)
+            batch_op.create_index('ix_customers_created_at_id', ['created_at', 'id'], unique=False, postgresql_concurrently=True)
+            batch_op.create_index('ix_customers_updated_at', ['updated_at'], unique=False, postgresql_concurrently=True)
+
+        with op.batch_alter_table('investigations', schema=None) as batch_op:
+            batch_op.create_index('ix_investigations_case_id_created_at_id', ['case_id', 'created_at', 'id'], unique=False, postgresql_concurrently=True)
+            batch_op.create_index('ix_investigations_created_at_id', ['created_at', 'id'], unique=False, postgresql_concurrently=True)
+            batch_op.create_index('ix_investigations_status_created_at_id', ['status', 'created_at', 'id'], unique=False, postgresql_concurrently=True)
+            batch_op.create_index('ix_investigations_updated_at', ['updated_at'], unique=False, postgresql_concurrently=True)
+
+        with op.batch_alter_table('targets', schema=None) as batch_op:
+            batch_op.create_index('ix_targets_created_at_id', ['created_at', 'id'], unique=False, postgresql_concurrently=True)
+            batch_op.create_index('ix_targets_investigation_id_created_at_id', ['investigation_id', 'created_at', 'id'], unique=False, postgresql_concurrently=True)
+            batch_op.create_index('ix_targets_status_created_at_id', ['status', 'created_at', 'id'], unique=False, postgresql_concurrently=True)
+            batch_op.create_index('ix_targets_updated_at', ['updated_at'], unique=False, postgresql_concurrently=True)
+
+
+def downgrade():
+    # As in upgrade, drop without blocking writes
+    with op.get_context().autocommit_block():
+        with op.batch_alter_table('targets', schema=None) as batch_op:
+            batch_op.drop_index('ix_targets_updated_at', postgresql_concurrently=True)
+            batch_op.drop_index('ix_targets_status_created_at_id', postgresql_concurrently=True)
+            batch_op.drop_index('ix_targets_investigation_id_created_at_id', postgresql_concurrently=True)
+            batch_op.drop_index('ix_targets_created_at_id', postgresql_concurrently=True)
+
+        with op.batch_alter_table('investigations', schema=None) as batch_op:
+            batch_op.drop_index('ix_investigations_updated_at', postgresql_concurrently=True)
+            batch_op.drop_index('ix_investigations_status_created_at_id', postgresql_concurrently=True)
+            batch_op.drop_index('ix_investigations_created_at_id', postgresql_concurrently=True)
+            batch_op.drop_index('ix_investigations_case_id_created_at_id', postgresql_concurrently=True)
+
+        with op.batch_alter_table('customers', schema=None) as batch_op:
+            batch_op.drop_index('ix_customers_updated_at', postgresql_concurrently=True)
+            batch_op.drop_index('ix_customers_created_at_id', postgresql_concurrently=True)
+            batch_op.drop_index('ix_customers_case_id_created_at_id', postgresql_concurrently=True)
+
+        with op.batch_alter_table('cases', schema=None) as batch_op:
+            batch_op.drop_index('ix_cases_updated_at', postgresql_concurrently=True)
+            batch_op.drop_index('ix_cases_status_created_at_id', postgresql_concurrently=True)
+            batch_op.drop_index('ix_cases_created_at_id', postgresql_concurrently=True)